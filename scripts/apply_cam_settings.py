@@ -5,9 +5,14 @@ import autochecklist
 from args import ReccArgs
 from autochecklist import Messenger, TaskModel, TaskStatus
 from config import Config
-from external_services import Credential, CredentialStore, InputPolicy, bird_dog
+from external_services import (
+    Credential,
+    CredentialStore,
+    HttpSessionProvider,
+    InputPolicy,
+    bird_dog,
+)
 from lib import ReccDependencyProvider, SimplifiedMessengerSettings
-from requests import Session
 
 
 class ApplyCamSettingsArgs(ReccArgs):
@@ -23,33 +28,34 @@ def _make_task(
     config: Config,
     messenger: Messenger,
     credential_store: CredentialStore,
+    http: HttpSessionProvider,
 ):
     def apply_cam_settings() -> None:
         base_url = config.cam_base_url[camera]
         settings_path = config.cam_settings_path[camera]
         settings = settings_path.read_text()
-        with Session() as s:
-            messenger.log_status(TaskStatus.RUNNING, "Logging in...")
-            password = credential_store.get(
-                Credential.BIRD_DOG_PASSWORD,
-                request_input=InputPolicy.AS_REQUIRED,
-            )
-            bird_dog.log_in(camera, s, config, password)
-            if not s.cookies.get("BirdDogSession"):
-                raise RuntimeError(
-                    "Failed to log in (cookie 'BirdDogSession' is not set)"
-                )
-            messenger.log_status(
-                TaskStatus.RUNNING,
-                f"Sending settings (from {settings_path})...",
-            )
-            s.post(
-                f"{base_url}/videoset",
-                data=settings,
-                headers={
-                    "Content-Type": f"multipart/form-data; boundary={config.cam_settings_form_boundary}",
-                },
-            )
+        s = http.get(base_url)
+        messenger.log_status(TaskStatus.RUNNING, "Logging in...")
+        password = credential_store.get(
+            Credential.BIRD_DOG_PASSWORD,
+            request_input=InputPolicy.AS_REQUIRED,
+        )
+        # The session is shared, so clear any cookie left by an earlier attempt
+        s.cookies.clear()
+        bird_dog.log_in(camera, s, config, password)
+        if not s.cookies.get("BirdDogSession"):
+            raise RuntimeError("Failed to log in (cookie 'BirdDogSession' is not set)")
+        messenger.log_status(
+            TaskStatus.RUNNING,
+            f"Sending settings (from {settings_path})...",
+        )
+        s.post(
+            f"{base_url}/videoset",
+            data=settings,
+            headers={
+                "Content-Type": f"multipart/form-data; boundary={config.cam_settings_form_boundary}",
+            },
+        )
 
     return apply_cam_settings
 
@@ -72,6 +78,7 @@ def main(
                     config=config,
                     messenger=dep.messenger,
                     credential_store=dep.get(CredentialStore),
+                    http=dep.get(HttpSessionProvider),
                 ),
             )
             for camera in all_cameras
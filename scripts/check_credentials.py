@@ -9,6 +9,7 @@ from config import Config
 from external_services import (
     Credential,
     CredentialStore,
+    HttpSessionProvider,
     InputPolicy,
     PlanningCenterClient,
     bird_dog,
@@ -16,7 +17,6 @@ from external_services import (
 from external_services.boxcast import BoxCastApiClient
 from external_services.vimeo import ReccVimeoClient
 from lib import ReccDependencyProvider, SimplifiedMessengerSettings
-from requests import Session
 
 
 class CheckCredentialsArgs(ReccArgs):
@@ -53,7 +53,10 @@ def log_into_Vimeo(
 
 
 def log_into_BoxCast(
-    config: Config, credential_store: CredentialStore, messenger: Messenger
+    config: Config,
+    credential_store: CredentialStore,
+    messenger: Messenger,
+    http: HttpSessionProvider,
 ) -> None:
     BoxCastApiClient(
         messenger=messenger,
@@ -61,12 +64,16 @@ def log_into_BoxCast(
         config=config,
         # Since lazy_login = false, the login should be tested eagerly
         lazy_login=False,
+        http=http,
     )
     messenger.log_status(TaskStatus.DONE, "Successfully connected to BoxCast.")
 
 
 def log_into_Planning_Center(
-    config: Config, credential_store: CredentialStore, messenger: Messenger
+    config: Config,
+    credential_store: CredentialStore,
+    messenger: Messenger,
+    http: HttpSessionProvider,
 ) -> None:
     PlanningCenterClient(
         messenger=messenger,
@@ -74,12 +81,16 @@ def log_into_Planning_Center(
         config=config,
         # Since lazy_login = false, the login should be tested eagerly
         lazy_login=False,
+        http=http,
     )
     messenger.log_status(TaskStatus.DONE, "Successfully connected to Planning Center.")
 
 
 def log_into_BirdDog(
-    config: Config, credential_store: CredentialStore, messenger: Messenger
+    config: Config,
+    credential_store: CredentialStore,
+    messenger: Messenger,
+    http: HttpSessionProvider,
 ) -> None:
     all_cameras: List[Literal[1, 2, 3]] = [1, 2, 3]
     for camera in all_cameras:
@@ -91,14 +102,17 @@ def log_into_BirdDog(
                 InputPolicy.AS_REQUIRED if first_try else InputPolicy.ALWAYS,
             )
             first_try = False
-            with Session() as s:
-                bird_dog.log_in(camera, s, config, password)
-                if s.cookies.get("BirdDogSession"):
-                    break
-                messenger.log_problem(
-                    ProblemLevel.ERROR,
-                    "Failed to log in (cookie 'BirdDogSession' is not set)",
-                )
+            s = http.get(config.cam_base_url[camera])
+            # Don't let a cookie from an earlier attempt make a failed login
+            # look successful
+            s.cookies.clear()
+            bird_dog.log_in(camera, s, config, password)
+            if s.cookies.get("BirdDogSession"):
+                break
+            messenger.log_problem(
+                ProblemLevel.ERROR,
+                "Failed to log in (cookie 'BirdDogSession' is not set)",
+            )
     messenger.log_status(
         TaskStatus.DONE,
         f"Successfully connected to cameras {', '.join([str(c) for c in all_cameras])}.",
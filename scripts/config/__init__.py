@@ -19,6 +19,7 @@ from .src.image_style import (
     Bbox,
     Colour,
     Font,
+    FontStyle,
     FooterSlideStyle,
     NoFooterSlideStyle,
     Rectangle,
@@ -393,6 +393,7 @@ class Config(BaseConfig):
             self.captions_dir = reader.get_directory("folder.captions")
             self.archived_assets_dir = reader.get_directory("folder.archived_assets")
             self.plan_summaries_dir = reader.get_directory("folder.plan_summaries")
+            self.cache_dir = reader.get_directory("folder.cache")
             if create_dirs:
                 self.home_dir.mkdir(exist_ok=True, parents=True)
                 self.assets_by_service_dir.mkdir(exist_ok=True, parents=True)
@@ -403,6 +404,7 @@ class Config(BaseConfig):
                 self.captions_dir.mkdir(exist_ok=True, parents=True)
                 self.archived_assets_dir.mkdir(exist_ok=True, parents=True)
                 self.plan_summaries_dir.mkdir(exist_ok=True, parents=True)
+                self.cache_dir.mkdir(exist_ok=True, parents=True)
 
             # Logging
             self.apply_cam_settings_log = reader.get_file("logging.apply_cam_settings")
@@ -464,6 +466,27 @@ class Config(BaseConfig):
             self.default_speaker_name = reader.get_str(
                 "planning_center.default_speaker_name"
             )
+            self.pco_max_concurrent_requests = reader.get_positive_int(
+                "planning_center.max_concurrent_requests"
+            )
+            self.pco_segmented_download_threshold_bytes = int(
+                reader.get_positive_float(
+                    "planning_center.segmented_download_threshold_mb"
+                )
+                * 1_000_000
+            )
+            self.pco_download_segments = reader.get_positive_int(
+                "planning_center.download_segments"
+            )
+            self.pco_max_parallel_downloads = reader.get_positive_int(
+                "planning_center.max_parallel_downloads"
+            )
+            self.pco_rate_limit_requests = reader.get_positive_int(
+                "planning_center.rate_limit_requests"
+            )
+            self.pco_rate_limit_period_seconds = reader.get_positive_float(
+                "planning_center.rate_limit_period_seconds"
+            )
 
             # Vimeo
             self.vimeo_new_video_hours = reader.get_positive_float(
@@ -511,6 +534,9 @@ class Config(BaseConfig):
             # API
             self.timeout_seconds = reader.get_positive_float("api.timeout_seconds")
             self.timeout = timedelta(seconds=self.timeout_seconds)
+            self.max_connections_per_host = reader.get_positive_int(
+                "api.max_connections_per_host"
+            )
 
             # Plan Summaries
             self.plan_summary_note_categories = set(
@@ -520,6 +546,9 @@ class Config(BaseConfig):
                 reader.get_str_list("plan_summary.vocal_note_categories")
             )
             self.vocals_notes_file = reader.get_file("plan_summary.vocals_notes_file")
+            self.plan_summary_update_interval_seconds = reader.get_positive_float(
+                "plan_summary.update_interval_seconds"
+            )
             self.announcements_to_ignore = {
                 a.lower()
                 for a in reader.get_str_list("plan_summary.announcements_to_ignore")
@@ -531,9 +560,13 @@ class Config(BaseConfig):
             )
             self.lyrics_filename = reader.get_str("slides.lyrics_filename")
             self.blueprints_filename = reader.get_str("slides.blueprints_filename")
+            self.slides_manifest_filename = reader.get_str("slides.manifest_filename")
             self.img_width = reader.get_positive_int("slides.image_width")
             self.img_height = reader.get_positive_int("slides.image_height")
             self.font_family = reader.get_str_list("slides.font_family")
+            self.slide_render_processes = reader.get_positive_int(
+                "slides.render_processes"
+            )
 
             fsm = "slides.fullscreen_message"
             self.fullscreen_message_style = NoFooterSlideStyle(
@@ -11,6 +11,7 @@ from .credentials import (
     InputPolicy,
 )
 from .github import Issue, IssueType, find_latest_github_issue
+from .http_sessions import HttpSessionProvider
 from .local_apps import launch_firefox, launch_vmix
 from .planning_center import (
     Attachment,
@@ -21,6 +22,7 @@ from .planning_center import (
     PlanItem,
     PlanningCenterClient,
     PlanSection,
+    PlanSnapshot,
     PresenterSet,
     Song,
     TeamMember,
@@ -12,7 +12,6 @@ from urllib.parse import urlparse
 import autochecklist
 import captions
 import dateutil.parser
-import requests
 from autochecklist import CancellationToken, Messenger, ProblemLevel
 from captions import Cue
 from config import Config
@@ -20,6 +19,7 @@ from requests import Response
 from requests.auth import HTTPBasicAuth
 
 from .credentials import Credential, CredentialStore, InputPolicy
+from .http_sessions import HttpSessionProvider
 
 
 @dataclass
@@ -41,10 +41,12 @@ class BoxCastApiClient:
         credential_store: CredentialStore,
         config: Config,
         lazy_login: bool,
+        http: HttpSessionProvider,
     ) -> None:
         self._messenger = messenger
         self._credential_store = credential_store
         self._config = config
+        self._http = http
         self._token: Optional[str] = None
         self._mutex = Lock()
         if not lazy_login:
@@ -202,7 +204,7 @@ class BoxCastApiClient:
         for i in range(self.MAX_ATTEMPTS):
             token = self._get_current_oauth_token(old_token=token)
             headers["Authorization"] = f"Bearer {token}"
-            response = requests.request(
+            response = self._http.get(url).request(
                 method=method,
                 url=url,
                 params=params,
@@ -319,7 +321,7 @@ class BoxCastApiClient:
     def _get_new_oauth_token(self, client_id: str, client_secret: str) -> str:
         auth = HTTPBasicAuth(client_id, client_secret)
         base_url = self._config.boxcast_auth_base_url
-        response = requests.post(
+        response = self._http.get(base_url).post(
             f"{base_url}/oauth2/token",
             data="grant_type=client_credentials",
             auth=auth,
@@ -3,9 +3,10 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Dict, List
 
-import requests
 from config import Config
 
+from .http_sessions import HttpSessionProvider
+
 
 @dataclass
 class Issue:
@@ -20,12 +21,14 @@ class IssueType(Enum):
     MCR_VIDEO_TEARDOWN = "mcr_video_teardown_checklist"
 
 
-def find_latest_github_issue(type: IssueType, config: Config) -> Issue:
+def find_latest_github_issue(
+    type: IssueType, config: Config, http: HttpSessionProvider
+) -> Issue:
     url = f"{config.github_api_repo_url}/issues"
     api_token = os.environ.get("RECC_GITHUB_TOKEN")
     headers = {"Authorization": f"Bearer {api_token}"} if api_token is not None else {}
     # Include closed issues and search by date for testing purposes
-    response = requests.get(
+    response = http.get(url).get(
         url=url,
         params={
             "state": "all",
@@ -0,0 +1,89 @@
+"""
+On-disk cache for JSON API responses, revalidated using conditional requests.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body: Any
+
+    def validators(self) -> Dict[str, str]:
+        """
+        Headers that ask the server to reply with 304 Not Modified if this
+        response is still up to date.
+        """
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Stores one file per (URL, params) pair so that the cache can safely be
+    shared by several scripts running at the same time.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self._dir = directory
+
+    def get(self, url: str, params: Mapping[str, object]) -> Optional[CachedResponse]:
+        path = self._path(url, params)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return CachedResponse(
+                etag=data["etag"],
+                last_modified=data["last_modified"],
+                body=data["body"],
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            # Missing or corrupted entry
+            return None
+
+    def put(
+        self,
+        url: str,
+        params: Mapping[str, object],
+        headers: Mapping[str, str],
+        body: Any,
+    ) -> None:
+        """
+        Save the response, as long as it has validators that can be used to
+        revalidate it later.
+        """
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        data = {"etag": etag, "last_modified": last_modified, "body": body}
+        self._dir.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so that other processes never see a
+        # half-written entry
+        fd, tmp = tempfile.mkstemp(dir=self._dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self._path(url, params))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _path(self, url: str, params: Mapping[str, object]) -> Path:
+        key = json.dumps([url, sorted((k, str(v)) for (k, v) in params.items())])
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self._dir / f"{digest}.json"
@@ -0,0 +1,53 @@
+"""
+Shared HTTP sessions so that consecutive requests can reuse open connections.
+"""
+
+from __future__ import annotations
+
+from threading import Lock
+from typing import Dict
+from urllib.parse import urlparse
+
+from config import Config
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+
+class HttpSessionProvider:
+    """
+    Hands out one keep-alive session per host.
+    Each host gets its own session (rather than one session for everything)
+    so that cookies from one service can never leak into requests to another.
+    """
+
+    def __init__(self, config: Config) -> None:
+        self._max_connections_per_host = config.max_connections_per_host
+        self._sessions: Dict[str, Session] = {}
+        self._mutex = Lock()
+
+    def get(self, url: str) -> Session:
+        """Get the session for the host in the given URL."""
+        u = urlparse(url)
+        host = f"{u.scheme}://{u.netloc}"
+        with self._mutex:
+            if host not in self._sessions:
+                self._sessions[host] = self._make_session(host)
+            return self._sessions[host]
+
+    def close(self) -> None:
+        with self._mutex:
+            for s in self._sessions.values():
+                s.close()
+            self._sessions = {}
+
+    def _make_session(self, host: str) -> Session:
+        s = Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self._max_connections_per_host,
+            # Wait for a free connection rather than opening extra ones that
+            # would be thrown away afterwards
+            pool_block=True,
+        )
+        s.mount(f"{host}/", adapter)
+        return s
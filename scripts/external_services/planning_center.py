@@ -6,13 +6,20 @@ from __future__ import annotations
 
 import asyncio
 import functools
+import glob
+import hashlib
+import json
+import os
 import re
 import ssl
-from dataclasses import dataclass
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import date, timedelta
 from enum import Enum, auto
 from pathlib import Path
-from typing import Any, Callable, Dict, Generic, List, Optional, Set, Tuple, TypeVar
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set, Tuple, Union
 
 import aiohttp
 import certifi
@@ -23,8 +30,9 @@ from config import Config
 from requests.auth import HTTPBasicAuth
 
 from .credentials import Credential, CredentialStore, InputPolicy
-
-T = TypeVar("T")
+from .http_cache import ResponseCache
+from .http_sessions import HttpSessionProvider
+from .rate_limit import RateLimiter, parse_retry_after
 
 
 @dataclass(frozen=True)
@@ -95,6 +103,11 @@ class Attachment:
     num_bytes: int
     pco_filetype: str
     mime_type: str
+    updated_at: Optional[str] = field(default=None, compare=False)
+    """
+    When the attachment was last changed on Planning Center.
+    Not part of the attachment's identity.
+    """
 
     @property
     def file_type(self) -> FileType:
@@ -148,16 +161,34 @@ class PresenterSet:
 
 
 class PlanningCenterClient:
+    MAX_DOWNLOAD_ATTEMPTS = 3
+    MAX_RATE_LIMITED_ATTEMPTS = 5
+    # Partial downloads that haven't been touched in this long are unlikely
+    # to ever be resumed
+    STALE_PART_FILE_AGE = timedelta(days=7)
+
     def __init__(
         self,
         messenger: Messenger,
         credential_store: CredentialStore,
         config: Config,
+        http: HttpSessionProvider,
         lazy_login: bool = False,
     ):
         self._messenger = messenger
         self._credential_store = credential_store
         self._cfg = config
+        self._http = http
+        self._cache = ResponseCache(config.cache_dir / "planning_center")
+        # Shared by every request to the API, including the concurrent ones
+        self._rate_limiter = RateLimiter(
+            limit=config.pco_rate_limit_requests,
+            period=config.pco_rate_limit_period_seconds,
+        )
+        self._snapshots: Dict[PlanId, PlanSnapshot] = {}
+        # (reader, plan) pairs that have already read a snapshot
+        self._snapshot_readers: Set[Tuple[str, PlanId]] = set()
+        self._snapshots_lock = threading.Lock()
 
         if not lazy_login:
             self._test_credentials(max_attempts=3)
@@ -171,11 +202,18 @@ class PlanningCenterClient:
         service_types = {
             s for s in service_types if s.id not in self._cfg.pco_skipped_service_types
         }
-        plans = {
-            (s, p)
-            for s in service_types
-            for p in self._find_plans_by_service_type_and_date(s, dt)
-        }
+        # Search every service type at once so that the lookup only takes as
+        # long as the slowest request
+        with ThreadPoolExecutor(
+            max_workers=self._cfg.pco_max_concurrent_requests
+        ) as executor:
+            plans_by_service_type = {
+                s: executor.submit(self._find_plans_by_service_type_and_date, s, dt)
+                for s in service_types
+            }
+            plans = {
+                (s, p) for (s, f) in plans_by_service_type.items() for p in f.result()
+            }
         if len(plans) == 0:
             raise ValueError(f"No plans found on {dt.strftime('%Y-%m-%d')}.")
         elif len(plans) == 1:
@@ -198,8 +236,34 @@ class PlanningCenterClient:
                 )
             return plan
 
+    def find_plans_in_range(self, start: date, end: date) -> List[Plan]:
+        """
+        Find every plan from `start` through `end` (inclusive), across all
+        service types, sorted by date.
+        """
+        self._messenger.log_status(
+            TaskStatus.RUNNING,
+            f"Searching for plans from {start.strftime('%Y-%m-%d')} to {end.strftime('%Y-%m-%d')}",
+        )
+        service_types = {
+            s
+            for s in self._find_service_types()
+            if s.id not in self._cfg.pco_skipped_service_types
+        }
+        with ThreadPoolExecutor(
+            max_workers=self._cfg.pco_max_concurrent_requests
+        ) as executor:
+            plans_by_service_type = [
+                executor.submit(
+                    self._find_plans_by_service_type_and_range, s, start, end
+                )
+                for s in service_types
+            ]
+            plans = [p for f in plans_by_service_type for p in f.result()]
+        return sorted(plans, key=lambda p: (p.date, p.service_type_name, p.id.plan))
+
     def _find_service_types(self) -> List[ServiceType]:
-        response = self._send_and_check_status(
+        response = self._send_and_check_status_all_pages(
             url=f"{self._cfg.pco_services_base_url}/service_types", params={}
         )
         response = response["data"]
@@ -228,12 +292,52 @@ class PlanningCenterClient:
             for plan in plans
         }
 
+    def _find_plans_by_service_type_and_range(
+        self, service_type: ServiceType, start: date, end: date
+    ) -> List[Plan]:
+        plans = self._send_and_check_status_all_pages(
+            url=f"{self._cfg.pco_services_base_url}/service_types/{service_type.id}/plans",
+            params={
+                "filter": "before,after",
+                "before": (end + timedelta(days=1)).strftime("%Y-%m-%d"),
+                "after": start.strftime("%Y-%m-%d"),
+            },
+        )["data"]
+        return [
+            Plan(
+                id=PlanId(service_type=service_type.id, plan=plan["id"]),
+                service_type_name=service_type.name,
+                series_title=plan["attributes"]["series_title"] or "",
+                title=plan["attributes"]["title"] or "",
+                # The sort date is in local time, despite the "Z" suffix
+                date=date.fromisoformat(plan["attributes"]["sort_date"][:10]),
+                web_page_url=plan["attributes"]["planning_center_url"] or "",
+            )
+            for plan in plans
+        ]
+
     def find_plan_items(
         self,
         id: PlanId,
         include_songs: bool,
         include_item_notes: bool,
     ) -> List[PlanSection]:
+        return self.parse_plan_items(
+            self.find_plan_items_json(
+                id, include_songs=include_songs, include_item_notes=include_item_notes
+            )
+        )
+
+    def find_plan_items_json(
+        self,
+        id: PlanId,
+        include_songs: bool,
+        include_item_notes: bool,
+    ) -> Any:
+        """
+        Get the raw response listing the items in a plan, without parsing it.
+        Use `parse_plan_items()` to turn it into a list of sections.
+        """
         params: Dict[str, object] = {"per_page": 200}
         include: List[str] = []
         if include_songs:
@@ -242,14 +346,18 @@ class PlanningCenterClient:
             include.append("item_notes")
         if include:
             params["include"] = ",".join(include)
-        items_json = self._send_and_check_status(
+        return self._send_and_check_status_all_pages(
             url=f"{self._plan_url(id)}/items",
             params=params,
         )
+
+    @staticmethod
+    def parse_plan_items(items_json: Any) -> List[PlanSection]:
+        doc = _Document(items_json)
         sections: List[PlanSection] = []
         current_section_title: str = "[[FAKE SECTION]]"
         current_section_items: List[PlanItem] = []
-        for itm in items_json["data"]:
+        for itm in doc.data:
             if itm["attributes"]["item_type"] == "header":
                 if current_section_title != "[[FAKE SECTION]]" or current_section_items:
                     sections.append(
@@ -262,10 +370,8 @@ class PlanningCenterClient:
                 current_section_items = []
             else:
                 item_title = str(itm["attributes"]["title"])
-                song = _find_song(
-                    itm, included=items_json["included"], default_title=item_title
-                )
-                notes = _find_notes(itm, included=items_json["included"])
+                song = _find_song(itm, doc, default_title=item_title)
+                notes = _find_notes(itm, doc)
                 item = PlanItem(
                     title=item_title,
                     description=itm["attributes"]["description"] or "",
@@ -279,27 +385,38 @@ class PlanningCenterClient:
             )
         return sections
 
+    def find_plan_snapshot(
+        self, id: PlanId, refresh: bool = False, reader: Optional[str] = None
+    ) -> PlanSnapshot:
+        """
+        Get the snapshot of the given plan that is shared by the whole process.
+        If `refresh` is `True`, replace it with a new snapshot so that the plan
+        is fetched again.
+        `reader` names the task reading the snapshot. If the same reader asks
+        for the same plan again, the task is being retried, so the snapshot is
+        refreshed to pick up changes made on Planning Center in the meantime.
+        """
+        with self._snapshots_lock:
+            if reader is not None:
+                refresh = refresh or (reader, id) in self._snapshot_readers
+                self._snapshot_readers.add((reader, id))
+            if refresh or id not in self._snapshots:
+                self._snapshots[id] = PlanSnapshot(self, id)
+            return self._snapshots[id]
+
     def find_message_notes(self, id: PlanId) -> str:
         sections = self.find_plan_items(
             id=id, include_songs=False, include_item_notes=False
         )
-        message_items = [
-            i
-            for s in sections
-            for i in s.items
-            if re.match("message title:", i.title, re.IGNORECASE)
-        ]
-        if len(message_items) != 1:
-            raise ValueError(
-                f"Found {len(message_items)} plan items which look like message notes."
-            )
-        return message_items[0].description
+        return _find_message_notes(sections)
 
     def find_attachments(self, id: PlanId) -> Set[Attachment]:
-        attachments_json = self._send_and_check_status(
-            url=f"{self._plan_url(id)}/attachments",
-            params={"per_page": 100},
-        )["data"]
+        attachments_json = _Document(
+            self._send_and_check_status_all_pages(
+                url=f"{self._plan_url(id)}/attachments",
+                params={"per_page": 100},
+            )
+        ).data
         return {
             Attachment(
                 id=a["id"],
@@ -307,6 +424,7 @@ class PlanningCenterClient:
                 num_bytes=a["attributes"]["file_size"],
                 pco_filetype=a["attributes"]["filetype"],
                 mime_type=a["attributes"]["content_type"],
+                updated_at=a["attributes"].get("updated_at"),
             )
             for a in attachments_json
         }
@@ -316,21 +434,29 @@ class PlanningCenterClient:
         downloads: Dict[Path, Attachment],
         messenger: Messenger,
         cancellation_token: Optional[CancellationToken],
-    ) -> Dict[Path, Optional[BaseException]]:
+    ) -> Dict[Path, Union[str, None, BaseException]]:
         """
         Downloads each attachment to the corresponding path. Returns a dict
-        containing, for each path, `None` if the attachment was downloaded
-        successfully and an exception otherwise.
+        containing, for each path, an exception if the download failed.
+        Otherwise, the value is the SHA-256 hash of the file.
+        Downloads are started in the order they appear in `downloads`, with
+        at most `pco_max_parallel_downloads` running at the same time.
+        Partial downloads that were abandoned long ago are removed from the
+        destination folders.
         """
-        results: List[Optional[BaseException]]
-        downloads_list = list(downloads.items())
-        paths = [p for (p, _) in downloads_list]
-        try:
-            app_id, secret = self._get_auth(force_input=False)
-            auth = aiohttp.BasicAuth(login=app_id, password=secret)
-            async with aiohttp.ClientSession() as session:
-                tasks = [
-                    self._download_one_asset(
+        results: Dict[Path, Union[str, None, BaseException]] = {}
+        queue = iter(downloads.items())
+        for d in {p.parent for p in downloads}:
+            _remove_stale_part_files(d, max_age=self.STALE_PART_FILE_AGE)
+
+        async def worker(session: aiohttp.ClientSession, auth: aiohttp.BasicAuth):
+            # All workers share the same iterator, so each download is only
+            # started once
+            for destination, attachment in queue:
+                try:
+                    if cancellation_token:
+                        cancellation_token.raise_if_cancelled()
+                    results[destination] = await self._download_one_asset(
                         attachment,
                         destination,
                         session,
@@ -338,15 +464,25 @@ class PlanningCenterClient:
                         messenger,
                         cancellation_token,
                     )
-                    for destination, attachment in downloads_list
-                ]
-                results = await asyncio.gather(*tasks, return_exceptions=True)
+                except asyncio.CancelledError:
+                    raise
+                except BaseException as e:
+                    results[destination] = e
+
+        try:
+            app_id, secret = self._get_auth(force_input=False)
+            auth = aiohttp.BasicAuth(login=app_id, password=secret)
+            async with aiohttp.ClientSession() as session:
+                num_workers = min(self._cfg.pco_max_parallel_downloads, len(downloads))
+                await asyncio.gather(
+                    *[worker(session, auth) for _ in range(num_workers)]
+                )
         except BaseException as e:
-            results = [e for _ in downloads]
+            results = {p: e for p in downloads}
         # Avoid RuntimeWarnings for unclosed resources
         # https://docs.aiohttp.org/en/stable/client_advanced.html#graceful-shutdown
         await asyncio.sleep(0.25)
-        return {p: r for (p, r) in zip(paths, results)}
+        return {p: results[p] for p in downloads}
 
     def find_presenters(self, id: PlanId) -> PresenterSet:
         people = self._send_and_check_status(
@@ -390,23 +526,102 @@ class PlanningCenterClient:
                 )
 
     def _send(
-        self, url: str, params: Dict[str, object], force_auth: bool
+        self,
+        url: str,
+        params: Dict[str, object],
+        force_auth: bool,
+        headers: Optional[Dict[str, str]] = None,
     ) -> requests.Response:
         app_id, secret = self._get_auth(force_input=force_auth)
-        return requests.get(
-            url=url,
-            params=params,  # pyright: ignore[reportArgumentType]
-            auth=HTTPBasicAuth(app_id, secret),
-            timeout=self._cfg.timeout_seconds,
+        attempt_num = 1
+        while True:
+            self._rate_limiter.acquire()
+            response = self._http.get(url).get(
+                url=url,
+                params=params,  # pyright: ignore[reportArgumentType]
+                headers=headers,
+                auth=HTTPBasicAuth(app_id, secret),
+                timeout=self._cfg.timeout_seconds,
+            )
+            retry = self._should_retry(response.status_code, response.headers)
+            if not retry or attempt_num == self.MAX_RATE_LIMITED_ATTEMPTS:
+                return response
+            self._messenger.log_debug(
+                f"Request to GET {url} was rate-limited (attempt {attempt_num}/{self.MAX_RATE_LIMITED_ATTEMPTS})."
+            )
+            attempt_num += 1
+
+    def _should_retry(self, status_code: int, headers: Mapping[str, str]) -> bool:
+        """
+        Update the rate limiter based on the response and decide whether the
+        request should be sent again.
+        """
+        self._rate_limiter.update(
+            limit=_parse_int(headers.get("X-PCO-API-Request-Rate-Limit")),
+            period=_parse_int(headers.get("X-PCO-API-Request-Rate-Period")),
+        )
+        if status_code != 429:
+            return False
+        retry_after = parse_retry_after(headers)
+        self._rate_limiter.pause(
+            self._rate_limiter.period if retry_after is None else retry_after
         )
+        return True
 
     def _send_and_check_status(self, url: str, params: Dict[str, object]) -> Any:
-        response = self._send(url=url, params=params, force_auth=False)
+        cached = self._cache.get(url, params)
+        response = self._send(
+            url=url,
+            params=params,
+            force_auth=False,
+            headers=cached.validators() if cached else None,
+        )
+        if response.status_code == 304 and cached is not None:
+            return cached.body
         if response.status_code // 100 != 2:
             raise ValueError(
                 f"Request to {url} failed with status code {response.status_code}"
             )
-        return response.json()
+        body = response.json()
+        try:
+            self._cache.put(url, params, response.headers, body)
+        except OSError as e:
+            self._messenger.log_debug(f"Failed to cache response from {url}: {e}")
+        return body
+
+    def _send_and_check_status_all_pages(
+        self, url: str, params: Dict[str, object]
+    ) -> Any:
+        """
+        Get every page of a list and merge them into a single response.
+        The first page says how many results there are in total, so the
+        remaining pages are requested concurrently.
+        """
+        first_page = self._send_and_check_status(url=url, params=params)
+        if "next" not in first_page.get("links", {}):
+            return first_page
+        page_size = len(first_page["data"])
+        total_count = first_page.get("meta", {}).get("total_count")
+        pages: List[Any] = [first_page]
+        if isinstance(total_count, int) and page_size > 0:
+            offsets = range(page_size, total_count, page_size)
+            with ThreadPoolExecutor(
+                max_workers=self._cfg.pco_max_concurrent_requests
+            ) as executor:
+                pages += executor.map(
+                    lambda offset: self._send_and_check_status(
+                        url=url, params=params | {"offset": offset}
+                    ),
+                    offsets,
+                )
+        else:
+            # Without the total count, there's no way to know how many
+            # requests are needed up front
+            page = first_page
+            while "next" in page.get("links", {}):
+                page = self._send_and_check_status(url=page["links"]["next"], params={})
+                pages.append(page)
+        return _merge_pages(pages)
 
     def _get_auth(self, force_input: bool) -> Tuple[str, str]:
         credentials = self._credential_store.get_multiple(
@@ -431,113 +646,456 @@ class PlanningCenterClient:
         auth: aiohttp.BasicAuth,
         messenger: Messenger,
         cancellation_token: Optional[CancellationToken],
-    ) -> None:
+    ) -> str:
+        """
+        Download the attachment and return its SHA-256 hash.
+        """
         key = messenger.create_progress_bar(
             display_name=attachment.filename,
             max_value=attachment.num_bytes / 1_000_000,
             units="MB",
         )
-        downloaded_bytes = 0
+        # Download to a separate file so that other programs (e.g., vMix) never
+        # see a partially-downloaded file. Keep it around if the download
+        # fails so that the next attempt can pick up where this one left off.
+        part = _get_part_path(destination, attachment)
+        ctx = ssl.create_default_context(cafile=certifi.where())
+        sha256 = ""
         try:
-            # Get URL for file contents
-            link_url = (
-                f"{self._cfg.pco_services_base_url}/attachments/{attachment.id}/open"
-            )
-            ctx = ssl.create_default_context(cafile=certifi.where())
+            for attempt_num in range(1, self.MAX_DOWNLOAD_ATTEMPTS + 1):
+                try:
+                    file_contents_url = await self._get_attachment_url(
+                        attachment, destination, session, auth, ctx
+                    )
+                    sha256 = await self._download_to_part_file(
+                        url=file_contents_url,
+                        attachment=attachment,
+                        part=part,
+                        session=session,
+                        ctx=ctx,
+                        report_progress=lambda n: messenger.update_progress_bar(
+                            key, n / 1_000_000
+                        ),
+                        cancellation_token=cancellation_token,
+                        messenger=messenger,
+                    )
+                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if attempt_num == self.MAX_DOWNLOAD_ATTEMPTS:
+                        raise
+                    messenger.log_debug(
+                        f"Download of {attachment.filename} was interrupted ({type(e).__name__}: {e}). Resuming (attempt {attempt_num + 1}/{self.MAX_DOWNLOAD_ATTEMPTS})."
+                    )
+            os.replace(part, destination)
+            # Data from earlier versions of the attachment can't be reused
+            # anymore
+            _remove_part_files(destination)
+            return sha256
+        finally:
+            messenger.delete_progress_bar(key)
+
+    async def _get_attachment_url(
+        self,
+        attachment: Attachment,
+        destination: Path,
+        session: aiohttp.ClientSession,
+        auth: aiohttp.BasicAuth,
+        ctx: ssl.SSLContext,
+    ) -> str:
+        link_url = f"{self._cfg.pco_services_base_url}/attachments/{attachment.id}/open"
+        for attempt_num in range(1, self.MAX_RATE_LIMITED_ATTEMPTS + 1):
+            await self._rate_limiter.acquire_async()
             async with session.post(link_url, auth=auth, ssl=ctx) as response:
+                if self._should_retry(response.status, response.headers):
+                    self._messenger.log_debug(
+                        f"Request to POST {link_url} was rate-limited (attempt {attempt_num}/{self.MAX_RATE_LIMITED_ATTEMPTS})."
+                    )
+                    continue
                 if response.status // 100 != 2:
                     raise ValueError(
                         f"Request to '{link_url}' for file '{destination.name}' failed with status {response.status}."
                     )
                 response_json = await response.json()
-                file_contents_url = response_json["data"]["attributes"][
-                    "attachment_url"
-                ]
+                return response_json["data"]["attributes"]["attachment_url"]
+        raise ValueError(
+            f"Request to '{link_url}' for file '{destination.name}' was rate-limited too many times."
+        )
 
-            # Get actual data
-            # Increase the timeout because we often read large videos
-            timeout = ClientTimeout(total=30 * 60)
+    async def _download_to_part_file(
+        self,
+        url: str,
+        attachment: Attachment,
+        part: Path,
+        session: aiohttp.ClientSession,
+        ctx: ssl.SSLContext,
+        report_progress: Callable[[int], None],
+        cancellation_token: Optional[CancellationToken],
+        messenger: Messenger,
+    ) -> str:
+        """
+        Download the file into `part` and return its SHA-256 hash. When the
+        file is downloaded over a single connection, the hash is computed as
+        the data arrives so that the file never has to be read again.
+        """
+        num_segments = self._cfg.pco_download_segments
+        if (
+            attachment.num_bytes >= self._cfg.pco_segmented_download_threshold_bytes
+            and num_segments > 1
+        ):
+            try:
+                return await self._download_segments(
+                    url=url,
+                    attachment=attachment,
+                    part=part,
+                    num_segments=num_segments,
+                    session=session,
+                    ctx=ctx,
+                    report_progress=report_progress,
+                    cancellation_token=cancellation_token,
+                )
+            except _RangeNotSupportedError:
+                messenger.log_debug(
+                    f"The server does not support range requests for {attachment.filename}, so it will be downloaded over a single connection."
+                )
+                _get_segments_path(part).unlink(missing_ok=True)
+                part.unlink(missing_ok=True)
+        if _get_segments_path(part).exists():
+            # The part file was preallocated for a segmented download, so its
+            # size says nothing about how much has been downloaded
+            _get_segments_path(part).unlink()
+            part.unlink(missing_ok=True)
+        offset = part.stat().st_size if part.exists() else 0
+        if offset > attachment.num_bytes:
+            # The attachment must have changed since the last attempt
+            offset = 0
+        headers = {"Range": f"bytes={offset}-"} if offset > 0 else {}
+        # Increase the timeout because we often read large videos
+        timeout = ClientTimeout(total=30 * 60)
+        async with session.get(
+            url, timeout=timeout, ssl=ctx, headers=headers
+        ) as response:
+            if response.status == 416 and offset == attachment.num_bytes:
+                # The previous attempt already got everything
+                report_progress(offset)
+                return await asyncio.to_thread(_hash_file, part)
+            if response.status // 100 != 2:
+                raise ValueError(
+                    f"Request to '{url}' for file '{attachment.filename}' failed with status {response.status}."
+                )
+            if response.status != 206 or _get_range_start(response) != offset:
+                # The server sent the whole file instead
+                offset = 0
+            hasher = hashlib.sha256()
+            if offset > 0:
+                # Only the data from previous attempts needs to be read back
+                with open(part, "rb") as f:
+                    while chunk := f.read(1024 * 1024):
+                        hasher.update(chunk)
+            with open(part, "ab" if offset > 0 else "wb") as f:
+                downloaded_bytes = offset
+                report_progress(downloaded_bytes)
+                async for data, _ in response.content.iter_chunks():
+                    if cancellation_token:
+                        cancellation_token.raise_if_cancelled()
+                    f.write(data)
+                    hasher.update(data)
+                    downloaded_bytes += len(data)
+                    report_progress(downloaded_bytes)
+            return hasher.hexdigest()
+
+    async def _download_segments(
+        self,
+        url: str,
+        attachment: Attachment,
+        part: Path,
+        num_segments: int,
+        session: aiohttp.ClientSession,
+        ctx: ssl.SSLContext,
+        report_progress: Callable[[int], None],
+        cancellation_token: Optional[CancellationToken],
+    ) -> str:
+        """
+        Download the file in several pieces at once, writing each one directly
+        at its offset in the (preallocated) part file. Return the SHA-256 hash
+        of the complete file.
+        """
+        size = attachment.num_bytes
+        bounds = [size * i // num_segments for i in range(num_segments + 1)]
+        segments_path = _get_segments_path(part)
+        done = _load_segment_progress(segments_path, part, size, num_segments)
+        if done is None:
+            done = [0 for _ in range(num_segments)]
+            with open(part, "wb") as f:
+                f.truncate(size)
+            # Record the progress right away. Otherwise, if the process is
+            # killed, the preallocated file could later be mistaken for a
+            # complete download.
+            segments_path.write_text(json.dumps(done), encoding="utf-8")
+        report_progress(sum(done))
+        timeout = ClientTimeout(total=30 * 60)
+
+        async def download_segment(i: int) -> None:
+            start = bounds[i] + done[i]
+            end = bounds[i + 1] - 1
+            if start > end:
+                return
             async with session.get(
-                file_contents_url, timeout=timeout, ssl=ctx
+                url,
+                timeout=timeout,
+                ssl=ctx,
+                headers={"Range": f"bytes={start}-{end}"},
             ) as response:
                 if response.status // 100 != 2:
                     raise ValueError(
-                        f"Request to '{file_contents_url}' for file '{destination.name}' failed with status {response.status}."
+                        f"Request to '{url}' for file '{attachment.filename}' failed with status {response.status}."
                     )
-                try:
-                    with open(destination, "wb") as f:
-                        async for data, _ in response.content.iter_chunks():
-                            if cancellation_token:
-                                cancellation_token.raise_if_cancelled()
-                            f.write(data)
-                            downloaded_bytes += len(data)
-                            messenger.update_progress_bar(
-                                key, downloaded_bytes / 1_000_000
-                            )
-                except BaseException:
-                    # Don't leave behind partially-downloaded files
-                    destination.unlink(missing_ok=True)
-                    raise
-        finally:
-            messenger.delete_progress_bar(key)
-
+                if response.status != 206 or _get_range_start(response) != start:
+                    raise _RangeNotSupportedError()
+                with open(part, "r+b") as f:
+                    f.seek(start)
+                    async for data, _ in response.content.iter_chunks():
+                        if cancellation_token:
+                            cancellation_token.raise_if_cancelled()
+                        f.write(data)
+                        done[i] += len(data)
+                        report_progress(sum(done))
 
-@dataclass
-class Maybe(Generic[T]):
-    data: Optional[T]
-
-    def bind(self, f: Callable[[T], T]) -> Maybe[T]:
-        if self.data is None:
-            return self
-        else:
-            return Maybe(f(self.data))
+        tasks = [
+            asyncio.ensure_future(download_segment(i)) for i in range(num_segments)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Remember which parts are done so that the next attempt can skip
+            # them
+            segments_path.write_text(json.dumps(done), encoding="utf-8")
+            raise
+        segments_path.unlink(missing_ok=True)
+        # The segments arrive out of order, so the file can only be hashed
+        # once it's complete. Do it in a separate thread so that other
+        # downloads can keep going in the meantime.
+        return await asyncio.to_thread(_hash_file, part)
 
 
-def _get(d: Any, key: str) -> Maybe[Any]:
+class PlanSnapshot:
     """
-    Make a series of accesses to a series of nested dictionaries, but check for
-    `None` at each step.
+    The contents of one plan, fetched from Planning Center at most once.
+    Each part of the plan is fetched the first time it's needed and then
+    shared by everything that reads the snapshot. The items always include
+    songs and notes, so one request serves every use of them.
+    Use `PlanningCenterClient.find_plan_snapshot()` rather than creating
+    snapshots directly.
     """
-    keys = key.split(".")
-    m = Maybe(d)
-    for k in keys:
-        m = m.bind(lambda d: d[k] if k in d else None)
-    return m
-
-
-def _find_song(itm: Any, included: List[Any], default_title: str) -> Optional[Song]:
-    song_id = _get(itm, "relationships.song.data.id").data
-    matching_songs = [i for i in included if i["type"] == "Song" and i["id"] == song_id]
-    song_json = None if not song_id or len(matching_songs) == 0 else matching_songs[0]
-
-    def make_song(s: Any) -> Song:
-        return Song(
-            ccli=_get(s, "attributes.ccli_number").bind(lambda s: str(s)).data,
-            title=_get(s, "attributes.title").bind(lambda s: str(s)).data
-            or default_title,
-            author=_get(s, "attributes.author").bind(lambda s: str(s)).data,
+
+    def __init__(self, client: PlanningCenterClient, id: PlanId) -> None:
+        self.id = id
+        self._client = client
+        self._values: Dict[str, Any] = {}
+        # One lock per part, so that different parts can be fetched at the
+        # same time
+        self._locks = {
+            k: threading.Lock()
+            for k in ["items_json", "sections", "attachments", "presenters"]
+        }
+
+    @property
+    def items_json(self) -> Any:
+        """The raw response listing the plan items, including songs and notes."""
+        return self._get(
+            "items_json",
+            lambda: self._client.find_plan_items_json(
+                self.id, include_songs=True, include_item_notes=True
+            ),
         )
 
-    song = Maybe(song_json).bind(make_song)
-    return song.data
+    @property
+    def sections(self) -> List[PlanSection]:
+        return self._get(
+            "sections", lambda: PlanningCenterClient.parse_plan_items(self.items_json)
+        )
 
+    @property
+    def attachments(self) -> Set[Attachment]:
+        return self._get("attachments", lambda: self._client.find_attachments(self.id))
 
-def _find_notes(itm: Any, included: List[Any]) -> List[ItemNote]:
-    note_ids: List[int] = (
-        _get(itm, "relationships.item_notes.data")
-        .bind(lambda d: [x["id"] for x in d])
-        .data
-        or []
+    @property
+    def presenters(self) -> PresenterSet:
+        return self._get("presenters", lambda: self._client.find_presenters(self.id))
+
+    @property
+    def message_notes(self) -> str:
+        return _find_message_notes(self.sections)
+
+    def _get(self, key: str, fetch: Callable[[], Any]) -> Any:
+        with self._locks[key]:
+            if key not in self._values:
+                self._values[key] = fetch()
+            return self._values[key]
+
+
+class _RangeNotSupportedError(Exception):
+    pass
+
+
+def _get_part_path(destination: Path, attachment: Attachment) -> Path:
+    # Include the attachment ID so that a download is only ever resumed from
+    # data belonging to the same attachment
+    return destination.with_name(f"{destination.name}.{attachment.id}.part")
+
+
+def _remove_part_files(destination: Path) -> None:
+    pattern = f"{glob.escape(destination.name)}.*.part"
+    for p in destination.parent.glob(pattern):
+        p.unlink(missing_ok=True)
+
+
+def _remove_stale_part_files(directory: Path, max_age: timedelta) -> None:
+    cutoff = time.time() - max_age.total_seconds()
+    try:
+        part_files = list(directory.glob("*.part"))
+    except OSError:
+        return
+    for p in part_files:
+        try:
+            if p.stat().st_mtime < cutoff:
+                p.unlink()
+        except OSError:
+            # The file may have been removed in the meantime or still be in
+            # use
+            pass
+
+
+def _get_segments_path(part: Path) -> Path:
+    return part.with_suffix(".segments.part")
+
+
+def _load_segment_progress(
+    segments_path: Path, part: Path, size: int, num_segments: int
+) -> Optional[List[int]]:
+    try:
+        done = json.loads(segments_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    is_valid = (
+        part.exists()
+        and part.stat().st_size == size
+        and isinstance(done, list)
+        and len(done) == num_segments  # pyright: ignore[reportUnknownArgumentType]
+        and all(isinstance(d, int) and d >= 0 for d in done)
     )
-    matching_notes = [
+    return done if is_valid else None  # pyright: ignore[reportUnknownVariableType]
+
+
+def _hash_file(p: Path) -> str:
+    hasher = hashlib.sha256()
+    with open(p, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _get_range_start(response: aiohttp.ClientResponse) -> Optional[int]:
+    # Content-Range: bytes <start>-<end>/<size>
+    m = re.fullmatch(
+        r"bytes (\d+)-\d+/(\d+|\*)", response.headers.get("Content-Range", "")
+    )
+    return int(m[1]) if m else None
+
+
+def _merge_pages(pages: List[Any]) -> Any:
+    data = [d for p in pages for d in p["data"]]
+    included: Dict[Tuple[str, str], Any] = {}
+    for p in pages:
+        for i in p.get("included", []):
+            included.setdefault((i["type"], i["id"]), i)
+    merged = dict(pages[0])
+    merged["data"] = data
+    merged["included"] = list(included.values())
+    merged["meta"] = dict(pages[0].get("meta", {})) | {"count": len(data)}
+    merged["links"] = {
+        k: v for (k, v) in pages[0].get("links", {}).items() if k != "next"
+    }
+    return merged
+
+
+class _Document:
+    """
+    A JSON:API response whose included resources are indexed by type and ID,
+    so that relationships can be resolved without searching.
+    """
+
+    def __init__(self, response: Any) -> None:
+        self.data: List[Any] = response["data"]
+        self._included: Dict[Tuple[str, str], Any] = {
+            (i["type"], i["id"]): i for i in response.get("included", [])
+        }
+
+    def related(self, resource: Any, relationship: str) -> List[Any]:
+        """
+        Get the included resources that `resource` refers to through the given
+        relationship.
+        Resources that were not included in the response are ignored.
+        """
+        linkage = ((resource.get("relationships") or {}).get(relationship) or {}).get(
+            "data"
+        )
+        if linkage is None:
+            return []
+        if isinstance(linkage, dict):
+            linkage = [linkage]
+        return [
+            r
+            for x in linkage  # pyright: ignore[reportUnknownVariableType]
+            if (r := self._included.get((x["type"], x["id"]))) is not None
+        ]
+
+
+def _find_message_notes(sections: List[PlanSection]) -> str:
+    message_items = [
         i
-        for i in included
-        if _get(i, "type").data == "ItemNote" and _get(i, "id").data in note_ids
+        for s in sections
+        for i in s.items
+        if re.match("message title:", i.title, re.IGNORECASE)
     ]
+    if len(message_items) != 1:
+        raise ValueError(
+            f"Found {len(message_items)} plan items which look like message notes."
+        )
+    return message_items[0].description
+
+
+def _parse_int(s: Optional[str]) -> Optional[int]:
+    if s is None:
+        return None
+    try:
+        return int(s)
+    except ValueError:
+        return None
+
+
+def _find_song(itm: Any, doc: _Document, default_title: str) -> Optional[Song]:
+    songs = doc.related(itm, "song")
+    if len(songs) == 0:
+        return None
+    attributes = songs[0]["attributes"]
+    ccli = attributes.get("ccli_number")
+    title = attributes.get("title")
+    author = attributes.get("author")
+    return Song(
+        ccli=None if ccli is None else str(ccli),
+        title=str(title) if title else default_title,
+        author=None if author is None else str(author),
+    )
+
+
+def _find_notes(itm: Any, doc: _Document) -> List[ItemNote]:
     return [
         ItemNote(
-            category=_get(n, "attributes.category_name").data or "",
-            contents=_get(n, "attributes.content").data or "",
+            category=n["attributes"].get("category_name") or "",
+            contents=n["attributes"].get("content") or "",
         )
-        for n in matching_notes
+        for n in doc.related(itm, "item_notes")
     ]
@@ -0,0 +1,115 @@
+"""
+Client-side rate limiting, so that bursts of requests wait their turn instead
+of being rejected by the server.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from typing import Callable, Mapping, Optional
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread and async task that talks to a given
+    API.
+    Each request takes one token; tokens are refilled continuously at a rate
+    of `limit` per `period` seconds.
+    When the bucket is empty, callers reserve a future token and wait for it,
+    so requests are queued in the order they arrived.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        period: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._clock = clock
+        self._mutex = Lock()
+        self._limit = limit
+        self._period = period
+        self._tokens = float(limit)
+        self._last_refill = clock()
+        self._paused_until = 0.0
+
+    def acquire(self) -> None:
+        """Wait (blocking the current thread) until a request may be sent."""
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """Wait (without blocking the event loop) until a request may be sent."""
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def update(self, limit: Optional[int], period: Optional[float]) -> None:
+        """Adjust the rate after the server reported its actual limit."""
+        with self._mutex:
+            self._refill()
+            if limit is not None and limit > 0:
+                self._limit = limit
+            if period is not None and period > 0:
+                self._period = period
+            self._tokens = min(self._tokens, float(self._limit))
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold back every request for the given number of seconds (e.g., after
+        the server responded with 429 Too Many Requests).
+        """
+        with self._mutex:
+            self._refill()
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+            # Whatever was left in the bucket evidently doesn't match the
+            # server's view
+            self._tokens = min(self._tokens, 0.0)
+
+    @property
+    def period(self) -> float:
+        return self._period
+
+    def _reserve(self) -> float:
+        with self._mutex:
+            self._refill()
+            self._tokens -= 1
+            now = self._clock()
+            # A negative balance means other callers are already waiting, so
+            # get in line behind them
+            wait_for_token = -self._tokens * self._period / self._limit
+            return max(wait_for_token, self._paused_until - now, 0.0)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(
+            float(self._limit), self._tokens + elapsed * self._limit / self._period
+        )
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Read the number of seconds to wait from the `Retry-After` header, which may
+    be either a number of seconds or an HTTP date.
+    """
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
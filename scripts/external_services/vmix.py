@@ -6,10 +6,11 @@ from pathlib import Path
 from typing import Dict, List, Optional
 from xml.etree import ElementTree
 
-import requests
 from config import Config
 from requests import ConnectTimeout, Response
 
+from .http_sessions import HttpSessionProvider
+
 
 class VmixInputType(Enum):
     IMAGE = "Image"
@@ -48,8 +49,9 @@ class VmixState:
 
 
 class VmixClient:
-    def __init__(self, config: Config) -> None:
+    def __init__(self, config: Config, http: HttpSessionProvider) -> None:
         self._cfg = config
+        self._http = http
 
     def save_preset(self, p: Path) -> None:
         response = self._send(
@@ -115,7 +117,7 @@ class VmixClient:
 
     def _send(self, params: Optional[Dict[str, str]] = None) -> Response:
         try:
-            return requests.get(
+            return self._http.get(self._cfg.vmix_base_url).get(
                 url=self._cfg.vmix_base_url,
                 params=params,
                 timeout=self._cfg.timeout_seconds,
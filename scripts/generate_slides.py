@@ -7,13 +7,8 @@ import autochecklist
 from args import ReccArgs
 from autochecklist import Messenger, TaskModel, TaskStatus
 from lib import ReccDependencyProvider, SimplifiedMessengerSettings
-from lib.slides import (
-    Config,
-    Slide,
-    SlideBlueprint,
-    SlideBlueprintReader,
-    SlideGenerator,
-)
+from lib.slide_manifest import SlideManifest
+from lib.slides import Config, SlideBlueprint, SlideBlueprintReader, SlideGenerator
 
 _FULLSCREEN_STYLE = "fullscreen"
 _LOWER_THIRD_STYLE = "lower-third"
@@ -81,6 +76,10 @@ class GenerateSlidesConfig(Config):
     def blueprints_file(self) -> Path:
         return self.out_dir.joinpath(self.blueprints_filename)
 
+    @property
+    def slides_manifest_file(self) -> Path:
+        return self.out_dir.joinpath(self.slides_manifest_filename)
+
 
 blueprints: List[SlideBlueprint] = []
 
@@ -148,14 +147,26 @@ def generate_slides(
     generator: SlideGenerator,
     messenger: Messenger,
 ) -> None:
-    slides: List[Slide] = []
+    # Only render slides that are new or have changed since the last run
+    manifest = SlideManifest(config.slides_manifest_file)
+    paths: List[Path] = []
+    skipped: List[Path] = []
+    removed: List[Path] = []
     if _FULLSCREEN_STYLE in args.styles:
         messenger.log_status(TaskStatus.RUNNING, "Generating fullscreen images...")
         blueprints_with_prefix = [
             b.with_name(f"FULL{i} - {b.name}" if b.name else f"FULL{i}")
             for i, b in enumerate(blueprints, start=1)
         ]
-        slides += generator.generate_fullscreen_slides(blueprints_with_prefix)
+        saved = generator.save_fullscreen_slides(
+            blueprints_with_prefix,
+            config.out_dir,
+            processes=config.slide_render_processes,
+            manifest=manifest,
+        )
+        removed += manifest.remove_stale(keep=saved.paths, prefix="FULL")
+        paths += saved.paths
+        skipped += saved.skipped
     if _LOWER_THIRD_STYLE in args.styles:
         messenger.log_status(
             TaskStatus.RUNNING, "Generating lower third images with a background..."
@@ -164,14 +175,24 @@ def generate_slides(
             b.with_name(f"LTD{i} - {b.name}" if b.name else f"LTD{i}")
             for i, b in enumerate(blueprints, start=1)
         ]
-        slides += generator.generate_lower_third_slides(blueprints_with_prefix)
+        saved = generator.save_lower_third_slides(
+            blueprints_with_prefix,
+            config.out_dir,
+            processes=config.slide_render_processes,
+            manifest=manifest,
+        )
+        removed += manifest.remove_stale(keep=saved.paths, prefix="LTD")
+        paths += saved.paths
+        skipped += saved.skipped
 
-    messenger.log_status(TaskStatus.RUNNING, "Saving images...")
-    for s in slides:
-        s.save(config.out_dir)
-    messenger.log_status(
-        TaskStatus.DONE, f"{len(slides)} images saved to {config.out_dir.as_posix()}."
-    )
+    manifest.save()
+
+    msg = f"{len(paths) - len(skipped)} images saved to {config.out_dir.as_posix()}."
+    if skipped:
+        msg += f" Skipped {len(skipped)} images that haven't changed."
+    if removed:
+        msg += f" Removed {len(removed)} outdated images."
+    messenger.log_status(TaskStatus.DONE, msg)
 
 
 def _get_demo_slides() -> List[SlideBlueprint]:
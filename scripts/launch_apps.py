@@ -1,15 +1,21 @@
 import os
 import sys
+import typing
 from argparse import ArgumentParser, Namespace
 from enum import Enum
-from typing import Callable, List, Optional
+from typing import Callable, List, Optional, Type
 
 import autochecklist
 import external_services
 from args import ReccArgs
 from autochecklist import DependencyProvider, MessengerSettings, TaskModel
 from config import Config
-from external_services import CredentialStore, IssueType, PlanningCenterClient
+from external_services import (
+    CredentialStore,
+    HttpSessionProvider,
+    IssueType,
+    PlanningCenterClient,
+)
 
 
 class App(Enum):
@@ -40,21 +46,43 @@ class LaunchAppsArgs(ReccArgs):
         return super().set_up_parser(parser)
 
 
+class LaunchAppsDependencyProvider(DependencyProvider):
+    """
+    Provides the shared HTTP sessions without importing `lib`, which would
+    pull in dependencies that aren't in requirements-launch-apps.txt.
+    """
+
+    def __init__(
+        self, *, args: LaunchAppsArgs, config: Config, messenger: MessengerSettings
+    ) -> None:
+        super().__init__(args=args, config=config, messenger=messenger)
+        self._http = HttpSessionProvider(config)
+
+    def get(self, typ: Type[object]) -> object:
+        if typ == HttpSessionProvider:
+            return self._http
+        return super().get(typ)
+
+    def shut_down(self) -> None:
+        self._http.close()
+
+
 def main(args: LaunchAppsArgs, config: Config, dep: DependencyProvider) -> None:
     tasks: List[TaskModel] = []
+    http = typing.cast(HttpSessionProvider, dep.get(HttpSessionProvider))
     for app in args.apps:
         match app:
             case App.PLANNING_CENTER:
                 t = TaskModel(
                     name="launch_PCO",
                     description="Open Planning Center Online.",
-                    func=lambda: launch_PCO(lazy_pco_client(), config),
+                    func=lambda: launch_PCO(lazy_pco_client(http), config),
                 )
             case App.PLANNING_CENTER_LIVE:
                 t = TaskModel(
                     name="launch_PCO_live",
                     description="Open the Planning Center live view.",
-                    func=lambda: launch_PCO_live(lazy_pco_client(), config),
+                    func=lambda: launch_PCO_live(lazy_pco_client(http), config),
                 )
             case App.BOXCAST:
                 t = TaskModel(
@@ -72,25 +100,25 @@ def main(args: LaunchAppsArgs, config: Config, dep: DependencyProvider) -> None:
                 t = TaskModel(
                     name="open_FOH_video_setup_checklist",
                     description="Open the FOH video setup checklist on GitHub.",
-                    func=lambda: open_FOH_video_setup_checklist(config),
+                    func=lambda: open_FOH_video_setup_checklist(config, http),
                 )
             case App.MCR_SOUND_SETUP_CHECKLIST:
                 t = TaskModel(
                     name="open_MCR_sound_setup_checklist",
                     description="Open the MCR sound setup checklist on GitHub.",
-                    func=lambda: open_MCR_sound_setup_checklist(config),
+                    func=lambda: open_MCR_sound_setup_checklist(config, http),
                 )
             case App.MCR_VIDEO_SETUP_CHECKLIST:
                 t = TaskModel(
                     name="open_MCR_video_setup_checklist",
                     description="Open the MCR video setup checklist on GitHub.",
-                    func=lambda: open_MCR_video_setup_checklist(config),
+                    func=lambda: open_MCR_video_setup_checklist(config, http),
                 )
             case App.MCR_VIDEO_TEARDOWN_CHECKLIST:
                 t = TaskModel(
                     name="open_MCR_video_teardown_checklist",
                     description="Open the MCR video teardown checklist on GitHub.",
-                    func=lambda: open_MCR_video_teardown_checklist(config),
+                    func=lambda: open_MCR_video_teardown_checklist(config, http),
                 )
             case App.VMIX:
                 t = TaskModel(
@@ -130,30 +158,32 @@ def launch_COP(config: Config) -> None:
     external_services.launch_firefox(config.cop_host_url)
 
 
-def open_FOH_video_setup_checklist(config: Config) -> None:
+def open_FOH_video_setup_checklist(config: Config, http: HttpSessionProvider) -> None:
     issue = external_services.find_latest_github_issue(
-        IssueType.FOH_VIDEO_SETUP, config
+        IssueType.FOH_VIDEO_SETUP, config, http
     )
     external_services.launch_firefox(issue.html_url)
 
 
-def open_MCR_sound_setup_checklist(config: Config) -> None:
+def open_MCR_sound_setup_checklist(config: Config, http: HttpSessionProvider) -> None:
     issue = external_services.find_latest_github_issue(
-        IssueType.MCR_SOUND_SETUP, config
+        IssueType.MCR_SOUND_SETUP, config, http
     )
     external_services.launch_firefox(issue.html_url)
 
 
-def open_MCR_video_setup_checklist(config: Config) -> None:
+def open_MCR_video_setup_checklist(config: Config, http: HttpSessionProvider) -> None:
     issue = external_services.find_latest_github_issue(
-        IssueType.MCR_VIDEO_SETUP, config
+        IssueType.MCR_VIDEO_SETUP, config, http
     )
     external_services.launch_firefox(issue.html_url)
 
 
-def open_MCR_video_teardown_checklist(config: Config) -> None:
+def open_MCR_video_teardown_checklist(
+    config: Config, http: HttpSessionProvider
+) -> None:
     issue = external_services.find_latest_github_issue(
-        IssueType.MCR_VIDEO_TEARDOWN, config
+        IssueType.MCR_VIDEO_TEARDOWN, config, http
     )
     external_services.launch_firefox(issue.html_url)
 
@@ -172,7 +202,7 @@ def open_vMix(config: Config) -> None:
 pco: Optional[PlanningCenterClient] = None
 
 
-def lazy_pco_client() -> PlanningCenterClient:
+def lazy_pco_client(http: HttpSessionProvider) -> PlanningCenterClient:
     global pco, dep, config
     if pco is not None:
         return pco
@@ -182,6 +212,7 @@ def lazy_pco_client() -> PlanningCenterClient:
         credential_store=cs,
         config=config,
         lazy_login=False,
+        http=http,
     )
     return pco_client
 
@@ -198,5 +229,5 @@ if __name__ == "__main__":
         icon=config.icon,
         auto_close=args.auto_close,
     )
-    dep = DependencyProvider(args=args, config=config, messenger=msg)
+    dep = LaunchAppsDependencyProvider(args=args, config=config, messenger=msg)
     main(args, config, dep)
@@ -14,9 +14,11 @@ from .assets import (
     DownloadResult,
     DownloadSkipped,
     DownloadSucceeded,
+    DownloadUnchanged,
 )
 from .dependency_provider import ReccDependencyProvider, SimplifiedMessengerSettings
 from .diff import Deletion, Edit, Insertion, NoOp, diff_has_changes, find_diff
+from .plan_summary_store import PlanSummaryStore
 from .slides import Slide, SlideBlueprint, SlideBlueprintReader, SlideGenerator
 from .summarize_plan import (
     AnnotatedItem,
@@ -24,11 +26,14 @@ from .summarize_plan import (
     PlanSummary,
     PlanSummaryDiff,
     diff_plan_summaries,
+    get_plan_summaries,
     get_plan_summary,
+    get_plan_summary_if_changed,
     get_vocals_notes,
     load_plan_summary,
     load_vocals_notes,
     plan_summary_diff_to_html,
+    plan_summary_from_json,
     plan_summary_to_json,
     vocals_notes_to_html,
     vocals_notes_to_json,
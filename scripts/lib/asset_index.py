@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import stat
+import tempfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    size: int
+    mtime_ns: int
+    inode: int
+    sha256: str
+
+
+class AssetIndex:
+    """
+    Persistent record of the contents of each file in the asset folders, so
+    that finding duplicates doesn't require reading every file each time.
+    Entries are only recomputed for files whose size or modification time has
+    changed since they were last indexed.
+    """
+
+    def __init__(self, index_file: Path) -> None:
+        self._index_file = index_file
+        self._entries: Optional[Dict[Path, IndexEntry]] = None
+        self._paths_by_content: Dict[Tuple[Path, int, str], Set[Path]] = {}
+
+    def find_duplicate(self, p: Path, sha256: Optional[str] = None) -> Optional[Path]:
+        """
+        Find another file in the same directory as `p` with the same contents.
+        If the hash of `p` is already known, pass it in as `sha256` to avoid
+        reading the file again.
+        """
+        resolved = p.resolve()
+        self.refresh(p.parent, known={resolved: sha256} if sha256 else {})
+        entry = self._get_entries().get(resolved)
+        if entry is None:
+            return None
+        key = (resolved.parent, entry.size, entry.sha256)
+        for other in sorted(self._paths_by_content.get(key, set())):
+            if other != resolved:
+                return p.parent.joinpath(other.name)
+        return None
+
+    def get_hash(self, p: Path) -> Optional[str]:
+        """
+        Get the hash of the given file, or `None` if it does not exist.
+        Unlike `refresh()`, this only looks at the one file, which is only
+        read again if it has changed since it was last indexed.
+        """
+        resolved = p.resolve()
+        try:
+            st = resolved.stat()
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        old = self._get_entries().get(resolved)
+        if old is not None and _is_current(old, st):
+            return old.sha256
+        sha256 = hash_file(resolved)
+        self._set(resolved, _make_entry(st, sha256))
+        return sha256
+
+    def record(self, p: Path, sha256: str) -> None:
+        """
+        Add or update the entry for a file whose hash is already known (e.g.,
+        because it was just downloaded), without looking at the rest of its
+        directory.
+        """
+        resolved = p.resolve()
+        st = resolved.stat()
+        self._get_entries()
+        self._set(resolved, _make_entry(st, sha256))
+
+    def refresh(self, directory: Path, known: Optional[Dict[Path, str]] = None) -> None:
+        """
+        Bring the entries for the given directory up to date.
+        `known` can be used to provide the hashes of files that were just
+        written.
+        """
+        directory = directory.resolve()
+        known = known or {}
+        entries = self._get_entries()
+        seen: Set[Path] = set()
+        for f in directory.iterdir():
+            # Skip partially-downloaded files
+            if f.suffix == ".part" or not f.is_file():
+                continue
+            f = f.resolve()
+            seen.add(f)
+            st = f.stat()
+            old = entries.get(f)
+            if old is not None and _is_current(old, st):
+                continue
+            self._set(f, _make_entry(st, known.get(f) or hash_file(f)))
+        for f in [f for f in entries if f.parent == directory and f not in seen]:
+            self._remove(f)
+
+    def save(self) -> None:
+        if self._entries is None:
+            return
+        data = {p.as_posix(): asdict(e) for (p, e) in self._entries.items()}
+        self._index_file.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so that the index is never left
+        # half-written
+        fd, tmp = tempfile.mkstemp(dir=self._index_file.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self._index_file)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _get_entries(self) -> Dict[Path, IndexEntry]:
+        if self._entries is None:
+            self._entries = {}
+            for p, e in _load(self._index_file).items():
+                self._set(p, e)
+        return self._entries
+
+    def _set(self, p: Path, e: IndexEntry) -> None:
+        assert self._entries is not None
+        self._remove(p)
+        self._entries[p] = e
+        key = (p.parent, e.size, e.sha256)
+        self._paths_by_content.setdefault(key, set()).add(p)
+
+    def _remove(self, p: Path) -> None:
+        assert self._entries is not None
+        old = self._entries.pop(p, None)
+        if old is not None:
+            self._paths_by_content[(p.parent, old.size, old.sha256)].discard(p)
+
+
+def hash_file(p: Path) -> str:
+    h = hashlib.sha256()
+    with open(p, "rb") as f:
+        while chunk := f.read(_CHUNK_SIZE):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _is_current(entry: IndexEntry, st: os.stat_result) -> bool:
+    return (
+        entry.size == st.st_size
+        and entry.mtime_ns == st.st_mtime_ns
+        and entry.inode == st.st_ino
+    )
+
+
+def _make_entry(st: os.stat_result, sha256: str) -> IndexEntry:
+    return IndexEntry(
+        size=st.st_size, mtime_ns=st.st_mtime_ns, inode=st.st_ino, sha256=sha256
+    )
+
+
+def _load(index_file: Path) -> Dict[Path, IndexEntry]:
+    try:
+        with open(index_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {Path(p): IndexEntry(**e) for (p, e) in data.items()}
+    except (OSError, ValueError, TypeError, AttributeError):
+        # Missing or corrupted index. It will be rebuilt from scratch.
+        return {}
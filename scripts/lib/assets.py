@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import asyncio
-import filecmp
 import os
 import re
 import traceback
@@ -9,12 +8,15 @@ from dataclasses import dataclass
 from datetime import date, timedelta
 from enum import Enum, auto
 from pathlib import Path
-from typing import Dict, Literal, Optional, Set, Union
+from typing import Dict, List, Literal, Optional, Set, Tuple, Union
 
 from autochecklist import Messenger, ProblemLevel, TaskStatus
 from config import Config
 from external_services import Attachment, FileType, PlanningCenterClient
 
+from .asset_index import AssetIndex
+from .attachment_manifest import AttachmentManifest
+
 
 class SkipCondition(Enum):
     """Conditions under which an asset download should be skipped"""
@@ -109,6 +111,19 @@ class DownloadSkipped(DownloadResult):
         return f"Not downloaded (reason: {self.reason})"
 
 
+@dataclass
+class DownloadUnchanged(DownloadSkipped):
+    """
+    The attachment was downloaded before and hasn't changed since, so the
+    existing file can be used as-is.
+    """
+
+    existing: Path
+
+    def __str__(self) -> str:
+        return f"Not downloaded (unchanged since it was downloaded to {self.existing.resolve().as_posix()})"
+
+
 @dataclass
 class DownloadFailed(DownloadResult):
     exc: BaseException
@@ -143,6 +158,10 @@ class AssetManager:
 
     def __init__(self, config: Config) -> None:
         self._config = config
+        self._index = AssetIndex(config.cache_dir / "asset_index.json")
+        self._manifest = AttachmentManifest(
+            config.cache_dir / "attachment_manifest.json"
+        )
         self._CATEGORIES = [
             AssetCategory(
                 name="livestream announcements video",
@@ -259,7 +278,9 @@ class AssetManager:
         messenger: Messenger,
     ) -> Dict[Attachment, DownloadResult]:
         plan = client.find_plan_by_date(self._config.start_time.date())
-        attachments = client.find_attachments(plan.id)
+        attachments = client.find_plan_snapshot(
+            plan.id, reader="download_pco_assets"
+        ).attachments
         download_plan = self.plan_downloads(
             attachments=attachments,
             messenger=messenger,
@@ -318,6 +339,12 @@ class AssetManager:
                     planned=_get_planned_paths(downloads),
                     overwrite=c.overwrite_existing,
                 )
+                existing = self._find_previous_download(a, c, p)
+                if existing is not None:
+                    downloads[a] = DownloadUnchanged(
+                        reason="unchanged since last download", existing=existing
+                    )
+                    continue
                 downloads[a] = Download(
                     p,
                     is_required=c.if_missing == Action.ERROR,
@@ -331,6 +358,9 @@ class AssetManager:
         for a in attachments_by_category[self._KIDS_VID_CATEGORY]:
             _check_kids_video_week_num(a, today, messenger)
 
+        # Checking for previous downloads may have hashed some files. Save
+        # them even if the plan is never executed (e.g., in a dry run).
+        self._save_caches(messenger)
         return DownloadPlan(downloads)
 
     def execute_plan(
@@ -338,6 +368,17 @@ class AssetManager:
         plan: DownloadPlan,
         pco_client: PlanningCenterClient,
         messenger: Messenger,
+    ) -> Dict[Attachment, DownloadResult]:
+        try:
+            return self._execute_plan(plan, pco_client, messenger)
+        finally:
+            self._save_caches(messenger)
+
+    def _execute_plan(
+        self,
+        plan: DownloadPlan,
+        pco_client: PlanningCenterClient,
+        messenger: Messenger,
     ) -> Dict[Attachment, DownloadResult]:
         cancellation_token = messenger.allow_cancel()
         downloads = {
@@ -345,7 +386,10 @@ class AssetManager:
         }
 
         if len(downloads) == 0:
-            messenger.log_problem(ProblemLevel.WARN, "No assets found to download.")
+            if not any(
+                isinstance(d, DownloadUnchanged) for d in plan.downloads.values()
+            ):
+                messenger.log_problem(ProblemLevel.WARN, "No assets found to download.")
             return {
                 a: d
                 for (a, d) in plan.downloads.items()
@@ -360,7 +404,7 @@ class AssetManager:
         messenger.log_status(TaskStatus.RUNNING, "Downloading new assets.")
         results = asyncio.run(
             pco_client.download_attachments(
-                {d.destination: a for (a, d) in downloads.items()},
+                {d.destination: a for (a, d) in _prioritize(downloads)},
                 messenger,
                 cancellation_token,
             )
@@ -372,7 +416,7 @@ class AssetManager:
                 ret[a] = d
             elif d.destination not in results:
                 ret[a] = DownloadSkipped("unknown reason")
-            elif (e := results[d.destination]) is not None:
+            elif isinstance(e := results[d.destination], BaseException):
                 ret[a] = DownloadFailed(e)
             else:
                 ret[a] = DownloadSucceeded(d.destination)
@@ -385,8 +429,9 @@ class AssetManager:
             assert (
                 d.destination in results
             ), f"the result of downloading {d.destination} should be known"
-            if (exc := results[d.destination]) is not None:
-                msg = f"Failed to download {a.filename}: {exc} ({type(exc).__name__})"
+            result = results[d.destination]
+            if isinstance(result, BaseException):
+                msg = f"Failed to download {a.filename}: {result} ({type(result).__name__})"
                 if d.is_required:
                     raise Exception(msg)
                 else:
@@ -394,22 +439,65 @@ class AssetManager:
                         ProblemLevel.WARN,
                         msg,
                         "".join(
-                            traceback.TracebackException.from_exception(exc).format()
+                            traceback.TracebackException.from_exception(result).format()
                         ),
                     )
-            elif d.deduplicate and (dup_of := _find_original(d.destination)):
-                ret[a] = DownloadDeduplicated(dup_of)
-                d.destination.unlink(missing_ok=True)
             else:
                 try:
                     # https://github.com/recc-tech/tech/issues/551
+                    # Do this before indexing the file so that the index has
+                    # the final modification time and doesn't hash it again
                     os.utime(d.destination)
                 except FileNotFoundError as e:
                     # Should probably never happen
                     ret[a] = DownloadFailed(e)
+                    continue
+                if d.deduplicate and (
+                    # Use the hash from the download, if available, so that
+                    # the file doesn't need to be read again
+                    dup_of := self._index.find_duplicate(d.destination, sha256=result)
+                ):
+                    ret[a] = DownloadDeduplicated(dup_of)
+                    d.destination.unlink(missing_ok=True)
+                    self._record_download(a, dup_of, sha256=result)
+                else:
+                    if result is not None:
+                        # Index the file now so that checking it on the next
+                        # run doesn't require reading it again
+                        self._index.record(d.destination, result)
+                    self._record_download(a, d.destination, sha256=result)
 
         return ret
 
+    def _save_caches(self, messenger: Messenger) -> None:
+        try:
+            self._index.save()
+            self._manifest.save()
+        except OSError as e:
+            messenger.log_debug(f"Failed to save the asset index or manifest: {e}")
+
+    def _find_previous_download(
+        self, a: Attachment, c: AssetCategory, destination: Path
+    ) -> Optional[Path]:
+        entry = self._manifest.find(a)
+        if entry is None:
+            return None
+        if c.deduplicate:
+            # Any identical file in the target folder will do
+            if entry.path.parent != c.target_dir.resolve():
+                return None
+        elif entry.path != destination.resolve():
+            return None
+        # Make sure the file wasn't deleted or edited locally
+        if self._index.get_hash(entry.path) != entry.sha256:
+            return None
+        return entry.path
+
+    def _record_download(self, a: Attachment, p: Path, sha256: Optional[str]) -> None:
+        sha256 = sha256 or self._index.get_hash(p)
+        if sha256 is not None:
+            self._manifest.record(a, p, sha256)
+
     def _classify(self, attachment: Attachment) -> Optional[AssetCategory]:
         for c in self._CATEGORIES:
             if c.matches(attachment):
@@ -478,14 +566,18 @@ def _find_available_path(
     )
 
 
-def _find_original(p: Path) -> Optional[Path]:
-    directory = p.parent
-    for other in directory.iterdir():
-        if p.resolve() == other.resolve() or not other.is_file():
-            continue
-        if filecmp.cmp(p, other, shallow=False):
-            return other
-    return None
+def _prioritize(
+    downloads: Dict[Attachment, Download]
+) -> List[Tuple[Attachment, Download]]:
+    """
+    Sort downloads in the order they should be started.
+    Required assets come first because other tasks are waiting on them.
+    Within each group, start with the biggest files; the small ones can fill
+    in the gaps at the end.
+    """
+    return sorted(
+        downloads.items(), key=lambda x: (not x[1].is_required, -x[0].num_bytes)
+    )
 
 
 def _check_kids_video_week_num(
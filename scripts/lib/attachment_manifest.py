@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from external_services import Attachment
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    num_bytes: int
+    updated_at: str
+    path: Path
+    sha256: str
+
+
+class AttachmentManifest:
+    """
+    Persistent record of where each Planning Center attachment was downloaded
+    to, so that attachments which haven't changed since the last download
+    don't need to be downloaded again.
+    """
+
+    def __init__(self, manifest_file: Path) -> None:
+        self._manifest_file = manifest_file
+        self._entries: Optional[Dict[str, ManifestEntry]] = None
+
+    def find(self, a: Attachment) -> Optional[ManifestEntry]:
+        """
+        Find the previous download of the given attachment, as long as the
+        attachment hasn't changed on Planning Center since then.
+        The caller is responsible for checking that the local file still
+        exists and matches the recorded hash.
+        """
+        if a.updated_at is None:
+            # No way to tell whether the attachment has changed
+            return None
+        entry = self._get_entries().get(a.id)
+        if (
+            entry is None
+            or entry.num_bytes != a.num_bytes
+            or entry.updated_at != a.updated_at
+        ):
+            return None
+        return entry
+
+    def record(self, a: Attachment, path: Path, sha256: str) -> None:
+        if a.updated_at is None:
+            return
+        self._get_entries()[a.id] = ManifestEntry(
+            num_bytes=a.num_bytes,
+            updated_at=a.updated_at,
+            path=path.resolve(),
+            sha256=sha256,
+        )
+
+    def save(self) -> None:
+        if self._entries is None:
+            return
+        data = {
+            id: asdict(e) | {"path": e.path.as_posix()}
+            for (id, e) in self._entries.items()
+        }
+        self._manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so that the manifest is never left
+        # half-written
+        fd, tmp = tempfile.mkstemp(dir=self._manifest_file.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self._manifest_file)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _get_entries(self) -> Dict[str, ManifestEntry]:
+        if self._entries is None:
+            self._entries = _load(self._manifest_file)
+        return self._entries
+
+
+def _load(manifest_file: Path) -> Dict[str, ManifestEntry]:
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {
+            id: ManifestEntry(**(e | {"path": Path(e["path"])}))
+            for (id, e) in data.items()
+        }
+    except (OSError, ValueError, TypeError, AttributeError, KeyError):
+        # Missing or corrupted manifest. It will be rebuilt from scratch.
+        return {}
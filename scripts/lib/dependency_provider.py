@@ -8,6 +8,7 @@ from autochecklist import DependencyProvider, Messenger, MessengerSettings
 from config import Config
 from external_services import (
     CredentialStore,
+    HttpSessionProvider,
     InputPolicy,
     PlanningCenterClient,
     VmixClient,
@@ -74,6 +75,7 @@ class ReccDependencyProvider(DependencyProvider):
         # Services
         self._config = config
         self._credential_store: Optional[CredentialStore] = None
+        self._http_session_provider: Optional[HttpSessionProvider] = None
         self._planning_center_client: Optional[PlanningCenterClient] = None
         self._vmix_client: Optional[VmixClient] = None
         self._bible_verse_finder: Optional[BibleVerseFinder] = None
@@ -98,6 +100,7 @@ class ReccDependencyProvider(DependencyProvider):
             type(self._config): lambda: self._config,
             type(self.messenger): lambda: self.messenger,
             CredentialStore: self._get_credential_store,
+            HttpSessionProvider: self._get_http_session_provider,
             PlanningCenterClient: self._get_planning_center_client,
             VmixClient: self._get_vmix_client,
             BibleVerseFinder: self._get_bible_verse_finder,
@@ -120,6 +123,11 @@ class ReccDependencyProvider(DependencyProvider):
             )
         return self._credential_store
 
+    def _get_http_session_provider(self) -> HttpSessionProvider:
+        if self._http_session_provider is None:
+            self._http_session_provider = HttpSessionProvider(config=self._config)
+        return self._http_session_provider
+
     def _get_planning_center_client(self) -> PlanningCenterClient:
         if self._planning_center_client is None:
             self._planning_center_client = PlanningCenterClient(
@@ -127,12 +135,15 @@ class ReccDependencyProvider(DependencyProvider):
                 messenger=self.messenger,
                 credential_store=self._get_credential_store(),
                 lazy_login=self._lazy_login,
+                http=self._get_http_session_provider(),
             )
         return self._planning_center_client
 
     def _get_vmix_client(self) -> VmixClient:
         if self._vmix_client is None:
-            self._vmix_client = VmixClient(config=self._config)
+            self._vmix_client = VmixClient(
+                config=self._config, http=self._get_http_session_provider()
+            )
         return self._vmix_client
 
     def _get_bible_verse_finder(self) -> BibleVerseFinder:
@@ -179,5 +190,10 @@ class ReccDependencyProvider(DependencyProvider):
                 credential_store=self._get_credential_store(),
                 config=self._config,
                 lazy_login=self._lazy_login,
+                http=self._get_http_session_provider(),
             )
         return self._boxcast_client
+
+    def shut_down(self) -> None:
+        if self._http_session_provider is not None:
+            self._http_session_provider.close()
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Callable, Generic, List, TypeVar
+from typing import Callable, Generic, List, Optional, Tuple, TypeVar
 
 B = TypeVar("B")
 T = TypeVar("T")
@@ -77,67 +77,149 @@ def diff_has_changes(edits: List[Edit[T]]) -> bool:
 def find_diff(old: List[T], new: List[T]) -> List[Edit[T]]:
     """
     Construct a sequence of edits to go from `old` to `new`.
+    Within each run of changes, deletions come before insertions.
 
     >>> find_diff(list("bat"), list("bot"))
     [NoOp('b'), Deletion('a'), Insertion('o'), NoOp('t')]
     """
-    # (1) Construct matrix of edit distances.
-    #     (similar to https://en.wikipedia.org/wiki/Longest_common_subsequence#Code_for_the_dynamic_programming_solution)
-    #      edit_matrix[i][j] is the edit distance between old[i:] and new[j:].
-    edit_matrix = [[-1 for _ in range(len(new) + 1)] for _ in range(len(old) + 1)]
-
-    def compute_edit_dist(i: int, j: int) -> int:
-        nonlocal edit_matrix
-        if edit_matrix[i][j] >= 0:
-            return edit_matrix[i][j]
-
-        if i == len(old):
-            dist = len(new[j:])
-        elif j == len(new):
-            dist = len(old[i:])
-        elif old[i] == new[j]:
-            dist = compute_edit_dist(i + 1, j + 1)
+    seq: List[Edit[T]] = []
+    _diff_range(old, 0, len(old), new, 0, len(new), seq)
+    return _deletions_first(seq)
+
+
+def _diff_range(
+    old: List[T],
+    old_lo: int,
+    old_hi: int,
+    new: List[T],
+    new_lo: int,
+    new_hi: int,
+    seq: List[Edit[T]],
+) -> None:
+    """
+    Append the edits to go from `old[old_lo:old_hi]` to `new[new_lo:new_hi]`
+    to `seq`.
+    This is Myers' linear-space algorithm: find the middle of an optimal edit
+    path, then solve each half separately.
+    The recursion depth is logarithmic in the number of changes.
+    """
+    # Trim the common prefix and suffix, which are usually most of the input
+    suffix_len = 0
+    while old_lo < old_hi and new_lo < new_hi and old[old_lo] == new[new_lo]:
+        seq.append(NoOp(old[old_lo]))
+        old_lo += 1
+        new_lo += 1
+    while old_lo < old_hi and new_lo < new_hi and old[old_hi - 1] == new[new_hi - 1]:
+        old_hi -= 1
+        new_hi -= 1
+        suffix_len += 1
+
+    if old_lo == old_hi:
+        seq += [Insertion(x) for x in new[new_lo:new_hi]]
+    elif new_lo == new_hi:
+        seq += [Deletion(x) for x in old[old_lo:old_hi]]
+    else:
+        split = _find_split(old, old_lo, old_hi, new, new_lo, new_hi)
+        if split is None:
+            # Nothing in common
+            seq += [Deletion(x) for x in old[old_lo:old_hi]]
+            seq += [Insertion(x) for x in new[new_lo:new_hi]]
         else:
-            dist = 1 + min(
-                compute_edit_dist(i + 1, j),  # Delete
-                compute_edit_dist(i, j + 1),  # Insert
-            )
+            (x, y) = split
+            _diff_range(old, old_lo, x, new, new_lo, y, seq)
+            _diff_range(old, x, old_hi, new, y, new_hi, seq)
 
-        assert dist >= 0
-        edit_matrix[i][j] = dist
-        return edit_matrix[i][j]
+    seq += [NoOp(x) for x in old[old_hi : old_hi + suffix_len]]
 
-    dist = compute_edit_dist(0, 0)
 
-    # (2) Navigate through the matrix and extract the best path.
-    i = 0
-    j = 0
-    seq: List[Edit[T]] = []
-    while True:
-        if i == len(old):
-            seq = seq + [Insertion(x) for x in new[j:]]
-            break
-        elif j == len(new):
-            seq = seq + [Deletion(x) for x in old[i:]]
-            break
-        elif old[i] == new[j]:
-            seq.append(NoOp(old[i]))
-            i += 1
-            j += 1
-        else:
-            # Is it better to insert or delete?
-            # Check the edit matrix!
-            # In case of a tie, delete first.
-            del_cost = edit_matrix[i + 1][j]
-            ins_cost = edit_matrix[i][j + 1]
-            if del_cost <= ins_cost:
-                # Delete
-                seq.append(Deletion(old[i]))
-                i += 1
+def _find_split(
+    old: List[T], old_lo: int, old_hi: int, new: List[T], new_lo: int, new_hi: int
+) -> Optional[Tuple[int, int]]:
+    """
+    Find a point in the middle of a shortest edit path by searching forward
+    from the start and backward from the end at the same time, until the two
+    searches meet.
+    Return the absolute indices into `old` and `new`, or `None` if the two
+    ranges have nothing in common.
+    """
+    n = old_hi - old_lo
+    m = new_hi - new_lo
+    max_d = (n + m + 1) // 2
+    offset = max_d
+    # forward[offset + k] is the furthest x reached so far on diagonal k
+    # (x - y = k) by the forward search. backward is the same for the backward
+    # search, with x and y counted from the end.
+    forward = [-1] * (2 * max_d + 2)
+    backward = [-1] * (2 * max_d + 2)
+    forward[offset + 1] = 0
+    backward[offset + 1] = 0
+    delta = n - m
+    # If the difference in length is odd, the searches will meet on the
+    # forward pass. Otherwise, they will meet on the backward pass.
+    meet_forward = delta % 2 != 0
+    # Diagonals that have run off the edge of the grid no longer need to be
+    # searched
+    (fwd_start, fwd_end, bwd_start, bwd_end) = (0, 0, 0, 0)
+    for d in range(max_d):
+        for k in range(-d + fwd_start, d + 1 - fwd_end, 2):
+            i = offset + k
+            if k == -d or (k != d and forward[i - 1] < forward[i + 1]):
+                x = forward[i + 1]
             else:
-                # Insert
-                seq.append(Insertion(new[j]))
-                j += 1
-
-    assert len([x for x in seq if not isinstance(x, NoOp)]) == dist
-    return seq
+                x = forward[i - 1] + 1
+            y = x - k
+            while x < n and y < m and old[old_lo + x] == new[new_lo + y]:
+                x += 1
+                y += 1
+            forward[i] = x
+            if x > n:
+                fwd_end += 2
+            elif y > m:
+                fwd_start += 2
+            elif meet_forward:
+                j = offset + delta - k
+                if 0 <= j < len(backward) and backward[j] != -1:
+                    if x >= n - backward[j]:
+                        return (old_lo + x, new_lo + y)
+        for k in range(-d + bwd_start, d + 1 - bwd_end, 2):
+            j = offset + k
+            if k == -d or (k != d and backward[j - 1] < backward[j + 1]):
+                x = backward[j + 1]
+            else:
+                x = backward[j - 1] + 1
+            y = x - k
+            while x < n and y < m and old[old_hi - 1 - x] == new[new_hi - 1 - y]:
+                x += 1
+                y += 1
+            backward[j] = x
+            if x > n:
+                bwd_end += 2
+            elif y > m:
+                bwd_start += 2
+            elif not meet_forward:
+                i = offset + delta - k
+                if 0 <= i < len(forward) and forward[i] != -1:
+                    fwd_x = forward[i]
+                    fwd_y = fwd_x - (delta - k)
+                    if fwd_x >= n - x:
+                        return (old_lo + fwd_x, new_lo + fwd_y)
+    return None
+
+
+def _deletions_first(seq: List[Edit[T]]) -> List[Edit[T]]:
+    """
+    Reorder each run of changes so that deletions come before insertions.
+    This doesn't change what the edits do, but it makes them easier to read.
+    """
+    result: List[Edit[T]] = []
+    insertions: List[Edit[T]] = []
+    for e in seq:
+        if isinstance(e, Insertion):
+            insertions.append(e)
+        elif isinstance(e, Deletion):
+            result.append(e)
+        else:
+            result += insertions
+            insertions = []
+            result.append(e)
+    return result + insertions
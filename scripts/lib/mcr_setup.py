@@ -67,7 +67,7 @@ def update_titles(
 ) -> None:
     today = config.start_time.date()
     plan = pco_client.find_plan_by_date(today)
-    people = pco_client.find_presenters(plan.id)
+    people = pco_client.find_plan_snapshot(plan.id, reader="update_titles").presenters
     available_people = PresenterSet(
         speakers={p for p in people.speakers if p.status != TeamMemberStatus.DECLINED},
         hosts={p for p in people.hosts if p.status != TeamMemberStatus.DECLINED},
@@ -198,7 +198,9 @@ def _update_pre_stream_title(
 def download_message_notes(client: PlanningCenterClient, config: McrSetupConfig):
     today = config.start_time.date()
     plan = client.find_plan_by_date(today)
-    message_notes = client.find_message_notes(plan.id)
+    message_notes = client.find_plan_snapshot(
+        plan.id, reader="download_message_notes"
+    ).message_notes
     if not message_notes:
         raise ValueError("No message notes have been posted to the plan yet.")
     config.message_notes_file.parent.mkdir(exist_ok=True, parents=True)
@@ -229,15 +231,17 @@ def generate_backup_slides(
         b.with_name(f"LTD{i} - {b.name}" if b.name else f"LTD{i}")
         for i, b in enumerate(blueprints, start=1)
     ]
-    slides = generator.generate_lower_third_slides(blueprints_with_prefix)
 
     messenger.log_status(TaskStatus.RUNNING, f"Saving images.")
-    for s in slides:
-        s.save(config.assets_by_service_dir)
+    saved = generator.save_lower_third_slides(
+        blueprints_with_prefix,
+        config.assets_by_service_dir,
+        processes=config.slide_render_processes,
+    )
 
     messenger.log_status(
         TaskStatus.DONE,
-        f"Generated {len(slides)} slides in {config.assets_by_service_dir.as_posix()}.",
+        f"Generated {len(saved.paths)} slides in {config.assets_by_service_dir.as_posix()}.",
     )
 
 
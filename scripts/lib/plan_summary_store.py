@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+import time
+from contextlib import closing
+from datetime import date, datetime
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from .summarize_plan import PlanSummary, plan_summary_from_json, plan_summary_to_json
+
+# Each delta is a list of operations that turn the lines of one revision into
+# the lines of another: either copy the next `n` lines from the base revision,
+# skip the next `n` lines of the base revision, or insert the given lines.
+# Multi-line strings (e.g., the message notes) are split into one "line" per
+# line of text.
+_Op = Tuple[str, Union[int, List[str]]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS revisions (
+    id TEXT PRIMARY KEY,
+    day TEXT NOT NULL,
+    base TEXT,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS revisions_by_day ON revisions (day, id);
+"""
+# Incremented whenever the database needs to be migrated
+_SCHEMA_VERSION = 1
+# Before the database, each revision was saved to its own JSON file
+_LEGACY_FILE_PATTERN = re.compile(r"\d{14}\.json")
+
+
+class PlanSummaryStore:
+    """
+    History of the plan summaries generated each day, kept in a single SQLite
+    database.
+    The latest revision of each day is stored in full and every older revision
+    is stored as a delta against the revision that came after it, so a
+    one-line edit to the plan only adds a few lines to the database and
+    loading the latest revision never requires applying any deltas.
+    Revision IDs are timestamps of the form YYYYmmddHHMMSS.
+    The first time the database is opened, any summaries saved as JSON files
+    in the same folder by older versions of the script are imported. The
+    files themselves are left alone.
+    """
+
+    def __init__(self, db_file: Path) -> None:
+        self._db_file = db_file
+        db_file.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(_SCHEMA)
+            (version,) = conn.execute("PRAGMA user_version").fetchone()
+            if version < 1:
+                _import_legacy_files(conn, db_file.parent)
+            conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    def add(self, summary: PlanSummary) -> str:
+        """Save a new revision and return its ID."""
+        text = plan_summary_to_json(summary)
+        now = datetime.now()
+        with closing(self._connect()) as conn, conn:
+            prev_id = _find_latest_id(conn, _day_key(now.date()))
+            id = now.strftime("%Y%m%d%H%M%S")
+            # Avoid overwriting a previous summary
+            if prev_id is not None and prev_id >= id:
+                time.sleep(1)
+                id = datetime.now().strftime("%Y%m%d%H%M%S")
+            _insert(conn, id, text)
+        return id
+
+    def list_ids(self, day: date) -> List[str]:
+        """List the IDs of the revisions from the given day, oldest first."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id FROM revisions WHERE day = ? ORDER BY id",
+                (_day_key(day),),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def latest_id(self, day: date) -> Optional[str]:
+        with closing(self._connect()) as conn:
+            return _find_latest_id(conn, _day_key(day))
+
+    def load(self, id: str) -> PlanSummary:
+        """
+        Load the revision with the given ID.
+        Raise `KeyError` if there is no such revision.
+        """
+        with closing(self._connect()) as conn:
+            # Follow the chain of deltas up to the latest revision
+            deltas: List[str] = []
+            current: Optional[str] = id
+            while True:
+                row = conn.execute(
+                    "SELECT base, content FROM revisions WHERE id = ?", (current,)
+                ).fetchone()
+                if row is None:
+                    raise KeyError(f"There is no plan summary with ID {current}.")
+                (base, content) = row
+                if base is None:
+                    text = content
+                    break
+                deltas.append(content)
+                current = base
+        for d in reversed(deltas):
+            text = _apply_delta(base=text, delta=json.loads(d))
+        return plan_summary_from_json(text)
+
+    def delete_day(self, day: date) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM revisions WHERE day = ?", (_day_key(day),))
+
+    def _connect(self) -> sqlite3.Connection:
+        # Use a new connection each time so that the store can be shared
+        # between threads
+        return sqlite3.connect(self._db_file)
+
+
+def _day_key(day: date) -> str:
+    return day.strftime("%Y%m%d")
+
+
+def _find_latest_id(conn: sqlite3.Connection, day: str) -> Optional[str]:
+    row = conn.execute(
+        "SELECT id FROM revisions WHERE day = ? ORDER BY id DESC LIMIT 1", (day,)
+    ).fetchone()
+    return None if row is None else row[0]
+
+
+def _insert(conn: sqlite3.Connection, id: str, text: str) -> None:
+    """
+    Store `text` in full as the latest revision of its day and replace the
+    previous latest revision with a delta against it.
+    """
+    day = id[:8]
+    prev_id = _find_latest_id(conn, day)
+    assert prev_id is None or prev_id < id
+    conn.execute(
+        "INSERT INTO revisions (id, day, base, content) VALUES (?, ?, NULL, ?)",
+        (id, day, text),
+    )
+    if prev_id is not None:
+        (prev_text,) = conn.execute(
+            "SELECT content FROM revisions WHERE id = ?", (prev_id,)
+        ).fetchone()
+        delta = _make_delta(base=text, target=prev_text)
+        conn.execute(
+            "UPDATE revisions SET base = ?, content = ? WHERE id = ?",
+            (id, json.dumps(delta), prev_id),
+        )
+
+
+def _import_legacy_files(conn: sqlite3.Connection, dir: Path) -> None:
+    files = sorted(
+        f for f in dir.glob("*.json") if _LEGACY_FILE_PATTERN.fullmatch(f.name)
+    )
+    for f in files:
+        try:
+            text = f.read_text(encoding="utf-8")
+            # Make sure the file is valid and use the current format
+            text = plan_summary_to_json(plan_summary_from_json(text))
+        except Exception:
+            # An unreadable summary is no reason to lose the rest
+            continue
+        latest_id = _find_latest_id(conn, f.stem[:8])
+        # Revisions can only be added after the latest one
+        if latest_id is not None and latest_id >= f.stem:
+            continue
+        _insert(conn, f.stem, text)
+
+
+def _split_lines(text: str) -> List[str]:
+    # The summary is stored as JSON, so the lines of a multi-line string are
+    # separated by escaped newlines rather than actual ones. Split there too
+    # so that editing one line of the message notes doesn't replace all of
+    # them.
+    return [
+        part
+        for line in text.splitlines(keepends=True)
+        for part in re.split(r"(?<=\\n)", line)
+        if part
+    ]
+
+
+def _make_delta(base: str, target: str) -> List[_Op]:
+    base_lines = _split_lines(base)
+    target_lines = _split_lines(target)
+    matcher = SequenceMatcher(a=base_lines, b=target_lines, autojunk=False)
+    delta: List[_Op] = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            delta.append(("=", i2 - i1))
+            continue
+        if i2 > i1:
+            delta.append(("-", i2 - i1))
+        if j2 > j1:
+            delta.append(("+", target_lines[j1:j2]))
+    return delta
+
+
+def _apply_delta(base: str, delta: List[_Op]) -> str:
+    base_lines = _split_lines(base)
+    target_lines: List[str] = []
+    i = 0
+    for op, arg in delta:
+        match op, arg:
+            case "=", int(n):
+                target_lines += base_lines[i : i + n]
+                i += n
+            case "-", int(n):
+                i += n
+            case "+", list(lines):
+                target_lines += lines
+            case _:
+                raise ValueError(f"Invalid delta operation: {op}.")
+    return "".join(target_lines)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Collection, Dict, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class SlideRecord:
+    blueprint_sha256: str
+    style_sha256: str
+    # Problems found while rendering the slide, so that they can be reported
+    # again when the slide is skipped
+    warnings: Tuple[str, ...] = ()
+
+
+class SlideManifest:
+    """
+    Persistent record of what each slide image was generated from, so that
+    slides whose text and style haven't changed don't need to be rendered
+    again.
+    Slides are identified by their file name, since the manifest is kept in
+    the same directory as the images.
+    """
+
+    def __init__(self, manifest_file: Path) -> None:
+        self._manifest_file = manifest_file
+        self._records: Optional[Dict[str, SlideRecord]] = None
+
+    def find_current(self, path: Path, record: SlideRecord) -> Optional[SlideRecord]:
+        """
+        Get the recorded entry for the image at `path` if it was generated
+        from the same blueprint and style as `record` and still exists.
+        Otherwise, return `None`.
+        """
+        old = self._get_records().get(path.name)
+        if (
+            old is None
+            or old.blueprint_sha256 != record.blueprint_sha256
+            or old.style_sha256 != record.style_sha256
+            or not path.is_file()
+        ):
+            return None
+        return old
+
+    def record(self, path: Path, record: SlideRecord) -> None:
+        self._get_records()[path.name] = record
+
+    def remove_stale(self, keep: Collection[Path], prefix: str = "") -> List[Path]:
+        """
+        Delete every image in the manifest whose name starts with `prefix` and
+        that isn't in `keep`.
+        Files that were never recorded in the manifest are left alone.
+        Return the paths of the deleted images.
+        """
+        records = self._get_records()
+        keep_names = {p.name for p in keep}
+        stale = [
+            name
+            for name in records
+            if name.startswith(prefix) and name not in keep_names
+        ]
+        removed: List[Path] = []
+        for name in stale:
+            path = self._manifest_file.parent.joinpath(name)
+            if path.is_file():
+                path.unlink()
+                removed.append(path)
+            del records[name]
+        return removed
+
+    def save(self) -> None:
+        if self._records is None:
+            return
+        data = {name: asdict(r) for (name, r) in self._records.items()}
+        self._manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so that the manifest is never left
+        # half-written
+        fd, tmp = tempfile.mkstemp(dir=self._manifest_file.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self._manifest_file)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _get_records(self) -> Dict[str, SlideRecord]:
+        if self._records is None:
+            self._records = _load(self._manifest_file)
+        return self._records
+
+
+def _load(manifest_file: Path) -> Dict[str, SlideRecord]:
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {
+            name: SlideRecord(
+                blueprint_sha256=r["blueprint_sha256"],
+                style_sha256=r["style_sha256"],
+                warnings=tuple(r.get("warnings", [])),
+            )
+            for (name, r) in data.items()
+        }
+    except (OSError, ValueError, TypeError, AttributeError, KeyError):
+        # Missing or corrupted manifest. Every slide will be rendered again.
+        return {}
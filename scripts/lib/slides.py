@@ -4,18 +4,25 @@ Functions for generating images and translating a message plan on Planning Cente
 
 from __future__ import annotations
 
+import dataclasses
+import functools
+import hashlib
 import json
+import os
 import re
+import tempfile
 import traceback
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Set, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 from autochecklist import Messenger, ProblemLevel
 from config import (
     Bbox,
     Config,
     Font,
+    FontStyle,
     FooterSlideStyle,
     NoFooterSlideStyle,
     Rectangle,
@@ -26,6 +33,8 @@ from matplotlib.font_manager import FontManager, FontProperties
 from PIL import Image, ImageDraw, ImageFont
 from PIL.ImageFont import FreeTypeFont
 
+from .slide_manifest import SlideManifest, SlideRecord
+
 SAFE_FILENAME_CHARACTERS = re.compile("^[a-z0-9-_ &,]$", re.IGNORECASE)
 # The maximum length of the full path to a file on Windows is 260 (see
 # https://learn.microsoft.com/en-us/windows/win32/fileio/maximum-file-path-limitation?tabs=registry)
@@ -229,73 +238,167 @@ class Slide:
     image: Image.Image
     name: str
 
-    def save(self, directory: Path):
-        path = directory.joinpath(self.name)
-        if path.suffix.lower() != ".png":
-            path = path.with_suffix(".png")
+    def save(self, directory: Path) -> Path:
+        path = _get_slide_path(directory, self.name)
         self.image.save(path, format="PNG")
+        return path
+
+
+SlideStyle = Union[FooterSlideStyle, NoFooterSlideStyle]
+
+
+@dataclass
+class SavedSlides:
+    paths: List[Path]
+    """Paths of all the slides, in the same order as the blueprints."""
+    skipped: List[Path]
+    """Slides that were not rendered again because they hadn't changed."""
 
 
 class SlideGenerator:
     def __init__(self, messenger: Messenger, config: Config):
         self._messenger = messenger
         self._config = config
-        self._font_manager = FontManager()
-
-    def generate_fullscreen_slides(
-        self, blueprints: List[SlideBlueprint]
-    ) -> List[Slide]:
-        return [
-            (
-                self._generate_slide_with_footer(
-                    b, self._config.fullscreen_scripture_style
-                )
-                if b.footer_text
-                else self._generate_slide_without_footer(
-                    b, self._config.fullscreen_message_style
-                )
-            )
-            for b in blueprints
-        ]
-
-    def generate_lower_third_slides(
-        self, blueprints: List[SlideBlueprint]
-    ) -> List[Slide]:
-        return [
-            (
-                self._generate_slide_with_footer(
-                    b, self._config.lowerthird_scripture_style
-                )
-                if b.footer_text
-                else self._generate_slide_without_footer(
-                    b, self._config.lowerthird_message_style
-                )
-            )
-            for b in blueprints
-        ]
+        self._renderer = _SlideRenderer(config.cache_dir)
+
+    def save_fullscreen_slides(
+        self,
+        blueprints: List[SlideBlueprint],
+        directory: Path,
+        processes: int = 1,
+        manifest: Optional[SlideManifest] = None,
+    ) -> SavedSlides:
+        """
+        Generate fullscreen slides and save them in the given directory.
+        If `processes` is more than 1, the slides are rendered and saved in
+        that many processes at once.
+        If a manifest is given, slides that haven't changed since they were
+        last saved are not rendered again.
+        """
+        return self._save_slides(
+            [(b, self._fullscreen_style(b)) for b in blueprints],
+            directory,
+            processes,
+            manifest,
+        )
 
-    def _generate_slide_without_footer(
-        self, blueprint: SlideBlueprint, style: NoFooterSlideStyle
-    ) -> Slide:
-        img = Image.new(
-            mode=style.mode,
-            size=style.width_height,
-            color=str(style.background_colour),
+    def save_lower_third_slides(
+        self,
+        blueprints: List[SlideBlueprint],
+        directory: Path,
+        processes: int = 1,
+        manifest: Optional[SlideManifest] = None,
+    ) -> SavedSlides:
+        """
+        Generate lower third slides and save them in the given directory.
+        If `processes` is more than 1, the slides are rendered and saved in
+        that many processes at once.
+        If a manifest is given, slides that haven't changed since they were
+        last saved are not rendered again.
+        """
+        return self._save_slides(
+            [(b, self._lower_third_style(b)) for b in blueprints],
+            directory,
+            processes,
+            manifest,
         )
-        draw = ImageDraw.Draw(img)
-        for rect in style.shapes:
-            self._draw_rectangle(draw, rect)
-        self._draw_text(
-            draw=draw,
-            text=blueprint.body_text,
-            slide_name=blueprint.name,
-            textbox=style.body,
+
+    def _fullscreen_style(self, blueprint: SlideBlueprint) -> SlideStyle:
+        return (
+            self._config.fullscreen_scripture_style
+            if blueprint.footer_text
+            else self._config.fullscreen_message_style
+        )
+
+    def _lower_third_style(self, blueprint: SlideBlueprint) -> SlideStyle:
+        return (
+            self._config.lowerthird_scripture_style
+            if blueprint.footer_text
+            else self._config.lowerthird_message_style
         )
-        return Slide(image=img, name=blueprint.name)
 
-    def _generate_slide_with_footer(
-        self, blueprint: SlideBlueprint, style: FooterSlideStyle
-    ) -> Slide:
+    def _save_slides(
+        self,
+        all_tasks: List[Tuple[SlideBlueprint, SlideStyle]],
+        directory: Path,
+        processes: int,
+        manifest: Optional[SlideManifest],
+    ) -> SavedSlides:
+        paths: List[Optional[Path]] = [None for _ in all_tasks]
+        warnings_by_slide: List[List[str]] = [[] for _ in all_tasks]
+        records = [_make_record(b, style) for (b, style) in all_tasks]
+        if manifest is not None:
+            for i, (b, _) in enumerate(all_tasks):
+                path = _get_slide_path(directory, b.name)
+                previous = manifest.find_current(path, records[i])
+                if previous is not None:
+                    paths[i] = path
+                    # Report problems again so that they don't go unnoticed
+                    # just because the slide didn't need to be rendered
+                    warnings_by_slide[i] = list(previous.warnings)
+        skipped = [p for p in paths if p is not None]
+        todo = [i for (i, p) in enumerate(paths) if p is None]
+        tasks = [all_tasks[i] for i in todo]
+        if processes <= 1 or len(tasks) <= 1:
+            results = [
+                _render_and_save(self._renderer, b, style, directory)
+                for (b, style) in tasks
+            ]
+        else:
+            # Rendering and PNG compression are CPU-bound, so threads wouldn't
+            # help. Each worker sends back only the path and any warnings
+            # rather than the whole image.
+            with ProcessPoolExecutor(
+                max_workers=processes,
+                initializer=_init_worker,
+                initargs=(self._config.cache_dir,),
+            ) as executor:
+                results = list(
+                    executor.map(
+                        _render_and_save_in_worker,
+                        [b for (b, _) in tasks],
+                        [style for (_, style) in tasks],
+                        [directory for _ in tasks],
+                    )
+                )
+        for i, (path, warnings) in zip(todo, results):
+            paths[i] = path
+            warnings_by_slide[i] = warnings
+            if manifest is not None:
+                manifest.record(
+                    path, dataclasses.replace(records[i], warnings=tuple(warnings))
+                )
+        for warnings in warnings_by_slide:
+            self._log_warnings(warnings)
+        return SavedSlides(paths=[p for p in paths if p is not None], skipped=skipped)
+
+    def _log_warnings(self, warnings: List[str]) -> None:
+        for w in warnings:
+            self._messenger.log_problem(ProblemLevel.WARN, w)
+
+
+class _SlideRenderer:
+    """
+    Draws slides without reporting anything directly, so that it can run in
+    a worker process.
+    Warnings are returned along with each slide instead.
+    """
+
+    def __init__(self, cache_dir: Path) -> None:
+        # Building a FontManager scans every font on the system, so only do
+        # it if a font isn't in the persisted list of font paths
+        self._font_manager: Optional[FontManager] = None
+        self._cache_dir = cache_dir
+        self._font_paths_file: Optional[Path] = None
+        self._font_paths: Optional[Dict[str, str]] = None
+        # Keep the caches bounded, since a renderer may draw many slides
+        self._load_font = functools.lru_cache(maxsize=256)(self._load_font_uncached)
+        self._get_measurer = functools.lru_cache(maxsize=256)(self._make_measurer)
+        self._wrap = functools.lru_cache(maxsize=4096)(self._wrap_uncached)
+
+    def render(
+        self, blueprint: SlideBlueprint, style: SlideStyle
+    ) -> Tuple[Slide, List[str]]:
         img = Image.new(
             mode=style.mode,
             size=style.width_height,
@@ -304,89 +407,145 @@ class SlideGenerator:
         draw = ImageDraw.Draw(img)
         for rect in style.shapes:
             self._draw_rectangle(draw, rect)
+        warnings: List[str] = []
         self._draw_text(
             draw=draw,
             text=blueprint.body_text,
             slide_name=blueprint.name,
             textbox=style.body,
+            warnings=warnings,
         )
-        self._draw_text(
-            draw=draw,
-            text=blueprint.footer_text,
-            slide_name=blueprint.name,
-            textbox=style.footer,
-        )
-        return Slide(image=img, name=blueprint.name)
+        if isinstance(style, FooterSlideStyle):
+            self._draw_text(
+                draw=draw,
+                text=blueprint.footer_text,
+                slide_name=blueprint.name,
+                textbox=style.footer,
+                warnings=warnings,
+            )
+        return (Slide(image=img, name=blueprint.name), warnings)
 
     def _draw_text(
-        self, draw: ImageDraw.ImageDraw, text: str, slide_name: str, textbox: Textbox
+        self,
+        draw: ImageDraw.ImageDraw,
+        text: str,
+        slide_name: str,
+        textbox: Textbox,
+        warnings: List[str],
     ):
-        size = textbox.font.max_size
         bbox = textbox.bbox
         halign = textbox.horiz_align
         valign = textbox.vert_align
-        while True:
+        anchor_horiz = {"left": "l", "center": "m", "right": "r"}[halign]
+        anchor_vert = {"top": "a", "center": "m", "bottom": "d"}[valign]
+        anchor = f"{anchor_horiz}{anchor_vert}"
+        x = {
+            "left": bbox.left,
+            "center": bbox.get_horizontal_centre(),
+            "right": bbox.right,
+        }[halign]
+        y = {
+            "top": bbox.top,
+            "center": bbox.get_vertical_centre(),
+            "bottom": bbox.bottom,
+        }[valign]
+        xy = (x, y)
+
+        def layout(size: int) -> Tuple[FreeTypeFont, str, int, bool]:
             font = self.make_font(textbox.font, size)
-            wrapped_text = _wrap_text(
-                text, bbox.get_width(), font, textbox.stroke_width
-            )
-
-            anchor_horiz = {"left": "l", "center": "m", "right": "r"}[halign]
-            anchor_vert = {"top": "a", "center": "m", "bottom": "d"}[valign]
-            anchor = f"{anchor_horiz}{anchor_vert}"
-
-            x = {
-                "left": bbox.left,
-                "center": bbox.get_horizontal_centre(),
-                "right": bbox.right,
-            }[halign]
-            y = {
-                "top": bbox.top,
-                "center": bbox.get_vertical_centre(),
-                "bottom": bbox.bottom,
-            }[valign]
-            xy = (x, y)
-
+            wrapped_text = self._wrap_text(text, bbox.get_width(), textbox, size)
             line_height = _get_font_bbox("A", font, textbox.stroke_width).get_height()
+            spacing = int(line_height * (textbox.line_spacing - 1))
             textbbox = Bbox(
                 *draw.textbbox(
                     xy=xy,
                     text=wrapped_text,
                     font=font,
-                    spacing=int(line_height * (textbox.line_spacing - 1)),
-                    align=textbox.horiz_align,
+                    spacing=spacing,
+                    align=halign,
                     anchor=anchor,
                     stroke_width=textbox.stroke_width,
                 )
             )
-            text_overflowed = (
-                textbbox.get_height() > bbox.get_height()
-                or textbbox.get_width() > bbox.get_width()
+            fits = (
+                textbbox.get_height() <= bbox.get_height()
+                and textbbox.get_width() <= bbox.get_width()
             )
-            if text_overflowed and size <= textbox.font.min_size:
-                self._messenger.log_problem(
-                    ProblemLevel.WARN,
-                    f"The text in slide '{slide_name}' does not fit within the normal text box, even with the smallest font size.",
-                )
-                break
-            elif text_overflowed:
-                size -= 1
-                continue
+            return (font, wrapped_text, spacing, fits)
+
+        # Find the largest font size at which the text fits. Larger text
+        # almost always takes up more space, so a binary search works.
+        layouts: Dict[int, Tuple[FreeTypeFont, str, int, bool]] = {}
+        best = None
+        (lo, hi) = (textbox.font.min_size, textbox.font.max_size)
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            layouts[mid] = layout(mid)
+            if layouts[mid][3]:
+                best = layouts[mid]
+                lo = mid + 1
             else:
-                # Text fits :)
-                break
+                hi = mid - 1
+        if best is None:
+            # Line breaks can occasionally make the text fit at a slightly
+            # larger size than one that doesn't fit. Check the sizes that the
+            # last steps of the search skipped over before giving up.
+            min_size = textbox.font.min_size
+            probed_above_min = [s for s in layouts if s > min_size]
+            stop = min(probed_above_min) if probed_above_min else min_size
+            for size in range(stop - 1, min_size, -1):
+                if size not in layouts:
+                    layouts[size] = layout(size)
+                if layouts[size][3]:
+                    best = layouts[size]
+                    break
+        if best is None:
+            warnings.append(
+                f"The text in slide '{slide_name}' does not fit within the normal text box, even with the smallest font size."
+            )
+            best = layouts[textbox.font.min_size]
+        (font, wrapped_text, spacing, _) = best
         draw.text(
             xy=xy,
             text=wrapped_text,
             fill=str(textbox.text_colour),
             font=font,
-            spacing=int(line_height * (textbox.line_spacing - 1)),
+            spacing=spacing,
             align=halign,
             anchor=anchor,
             stroke_width=textbox.stroke_width,
             stroke_fill=str(textbox.text_colour),
         )
 
+    def _wrap_text(self, text: str, max_width: int, textbox: Textbox, size: int) -> str:
+        # The same text is often wrapped more than once (e.g., the same
+        # footer on many slides)
+        return self._wrap(
+            text,
+            tuple(textbox.font.family),
+            textbox.font.style,
+            size,
+            max_width,
+            textbox.stroke_width,
+        )
+
+    def _wrap_uncached(
+        self,
+        text: str,
+        family: Tuple[str, ...],
+        style: FontStyle,
+        size: int,
+        max_width: int,
+        stroke_width: int,
+    ) -> str:
+        measurer = self._get_measurer(family, style, size, stroke_width)
+        return _wrap_text(text, max_width, measurer)
+
+    def _make_measurer(
+        self, family: Tuple[str, ...], style: FontStyle, size: int, stroke_width: int
+    ) -> _TextMeasurer:
+        return _TextMeasurer(self._load_font(family, style, size), stroke_width)
+
     def _draw_rectangle(self, draw: ImageDraw.ImageDraw, rect: Rectangle) -> None:
         b = rect.bbox
         draw.rectangle(
@@ -395,54 +554,187 @@ class SlideGenerator:
         )
 
     def make_font(self, font: Font, size: int) -> FreeTypeFont:
-        properties = FontProperties(family=font.family, style=font.style)
+        return self._load_font(tuple(font.family), font.style, size)
+
+    def _load_font_uncached(
+        self, family: Tuple[str, ...], style: FontStyle, size: int
+    ) -> FreeTypeFont:
+        return ImageFont.truetype(self._find_font_path(family, style), size=size)
+
+    def _find_font_path(self, family: Tuple[str, ...], style: FontStyle) -> str:
+        if self._font_paths is None:
+            self._font_paths_file = _get_font_paths_file(self._cache_dir)
+            self._font_paths = (
+                _load_font_paths(self._font_paths_file) if self._font_paths_file else {}
+            )
+        key = json.dumps([family, style])
+        path = self._font_paths.get(key)
+        if path is not None and Path(path).is_file():
+            return path
+        if self._font_manager is None:
+            self._font_manager = FontManager()
+        properties = FontProperties(family=list(family), style=style)
         path = self._font_manager.findfont(properties)
-        return ImageFont.truetype(path, size=size)
+        self._font_paths[key] = path
+        if self._font_paths_file is not None:
+            try:
+                _save_font_paths(self._font_paths_file, self._font_paths)
+            except OSError:
+                # Not a big deal; the font will just be looked up again next
+                # time
+                pass
+        return path
+
+
+def _get_slide_path(directory: Path, name: str) -> Path:
+    path = directory.joinpath(name)
+    if path.suffix.lower() != ".png":
+        path = path.with_suffix(".png")
+    return path
+
+
+def _make_record(blueprint: SlideBlueprint, style: SlideStyle) -> SlideRecord:
+    blueprint_data = json.dumps(
+        [blueprint.body_text, blueprint.footer_text, blueprint.name]
+    )
+    return SlideRecord(
+        blueprint_sha256=hashlib.sha256(blueprint_data.encode("utf-8")).hexdigest(),
+        # The styles are frozen dataclasses, so their repr covers every setting
+        style_sha256=hashlib.sha256(repr(style).encode("utf-8")).hexdigest(),
+    )
+
 
+# Each worker process keeps its own renderer, so that fonts and wrapped text
+# are cached across all the slides it renders
+_worker_renderer: Optional[_SlideRenderer] = None
 
-def _wrap_text(text: str, max_width: int, font: FreeTypeFont, stroke_width: int) -> str:
+
+def _init_worker(cache_dir: Path) -> None:
+    global _worker_renderer
+    _worker_renderer = _SlideRenderer(cache_dir)
+
+
+def _render_and_save_in_worker(
+    blueprint: SlideBlueprint, style: SlideStyle, directory: Path
+) -> Tuple[Path, List[str]]:
+    assert _worker_renderer is not None, "the worker was not initialized"
+    return _render_and_save(_worker_renderer, blueprint, style, directory)
+
+
+def _render_and_save(
+    renderer: _SlideRenderer,
+    blueprint: SlideBlueprint,
+    style: SlideStyle,
+    directory: Path,
+) -> Tuple[Path, List[str]]:
+    (slide, warnings) = renderer.render(blueprint, style)
+    return (slide.save(directory), warnings)
+
+
+def _get_font_paths_file(cache_dir: Path) -> Optional[Path]:
+    """
+    Get the file in which to persist font paths, or `None` if the cache
+    directory can't be used.
+    """
+    # A cache directory meant for another platform (e.g., "D:/..." on Linux)
+    # is not absolute and would end up relative to the working directory
+    if not cache_dir.is_absolute():
+        return None
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None
+    return cache_dir / "font_paths.json"
+
+
+def _load_font_paths(file: Path) -> Dict[str, str]:
+    try:
+        with open(file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {k: v for (k, v) in data.items() if isinstance(v, str)}
+
+
+def _save_font_paths(file: Path, paths: Dict[str, str]) -> None:
+    # Write to a temporary file first so that the file is never left
+    # half-written
+    fd, tmp = tempfile.mkstemp(dir=file.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(paths, f)
+        os.replace(tmp, file)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class _TextMeasurer:
+    """
+    Measures text in one font.
+    The width of a line can be estimated by adding up the widths of its words,
+    which are only measured once each.
+    """
+
+    def __init__(self, font: FreeTypeFont, stroke_width: int) -> None:
+        self._font = font
+        self._stroke_width = stroke_width
+        self._word_widths: Dict[str, float] = {}
+        self.space_width = font.getlength(" ")
+        # The stroke extends past both ends of the line
+        self.stroke_adjustment = 2 * stroke_width
+
+    def word_width(self, word: str) -> float:
+        if word not in self._word_widths:
+            self._word_widths[word] = self._font.getlength(word)
+        return self._word_widths[word]
+
+    def width(self, text: str) -> int:
+        """Measure the exact width of the given text."""
+        return _get_font_bbox(text, self._font, self._stroke_width).get_width()
+
+
+def _wrap_text(text: str, max_width: int, measurer: _TextMeasurer) -> str:
     text = text.strip().replace("\r\n", "\n")
     # Keep line breaks that the user manually chose
     lines = [re.sub(r"\s+", " ", line) for line in text.split("\n") if line]
-    return "\n".join(
-        [_wrap_line(line, max_width, font, stroke_width) for line in lines]
-    )
+    return "\n".join([_wrap_line(line, max_width, measurer) for line in lines])
 
 
-def _wrap_line(line: str, max_width: int, font: FreeTypeFont, stroke_width: int) -> str:
+def _wrap_line(line: str, max_width: int, measurer: _TextMeasurer) -> str:
     words = [w for w in line.split(" ") if w]
     output_lines: List[str] = []
     while words:
-        (wrapped_line, words) = _extract_max_prefix(
-            words, max_width, font, stroke_width
-        )
+        (wrapped_line, words) = _extract_max_prefix(words, max_width, measurer)
         output_lines.append(wrapped_line)
     return "\n".join(output_lines)
 
 
 def _extract_max_prefix(
-    words: List[str], max_width: int, font: FreeTypeFont, stroke_width: int
+    words: List[str], max_width: int, measurer: _TextMeasurer
 ) -> Tuple[str, List[str]]:
     """
     Return as many words as can fit on one line, along with the remaining words. At least one word will be taken regardless of its length.
     """
     if not words:
         raise ValueError("No words provided.")
-    words = list(words)  # Avoid side effects
-    output = words[0]
-    words = words[1:]
-    while True:
-        if not words:
-            break
-        next_word = words[0]
-        longer_output = f"{output} {next_word}"
-        width = _get_font_bbox(longer_output, font, stroke_width).get_width()
+    # Estimate how many words fit by adding up the widths of the words
+    n = 1
+    width = measurer.stroke_adjustment + measurer.word_width(words[0])
+    while n < len(words):
+        width += measurer.space_width + measurer.word_width(words[n])
         if width > max_width:
             break
-        else:
-            output = longer_output
-            words = words[1:]
-    return (output, words)
+        n += 1
+    # The estimate ignores details like kerning, so confirm it with real
+    # measurements. Usually it's right and this takes two measurements.
+    while n > 1 and measurer.width(" ".join(words[:n])) > max_width:
+        n -= 1
+    while n < len(words) and measurer.width(" ".join(words[: n + 1])) <= max_width:
+        n += 1
+    return (" ".join(words[:n]), words[n:])
 
 
 def _get_font_bbox(text: str, font: FreeTypeFont, stroke_width: int) -> Bbox:
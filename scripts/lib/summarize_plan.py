@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import hashlib
 import html
 import json
 import re
 import typing
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import date, datetime, time
 from pathlib import Path
@@ -318,10 +320,67 @@ def _validate_message_notes(original_notes: AnnotatedItem) -> AnnotatedItem:
 def get_plan_summary(
     client: PlanningCenterClient, messenger: Messenger, config: Config, dt: date
 ) -> PlanSummary:
+    _, summary = get_plan_summary_if_changed(
+        client=client, messenger=messenger, config=config, dt=dt, fingerprint=None
+    )
+    assert summary is not None, "there is no previous fingerprint to match"
+    return summary
+
+
+def get_plan_summaries(
+    client: PlanningCenterClient,
+    messenger: Messenger,
+    config: Config,
+    start: date,
+    end: date,
+) -> List[PlanSummary]:
+    """
+    Summarize every plan from `start` through `end` (inclusive), sorted by
+    date.
+    The items for all the plans are fetched at once, so this takes about as
+    long as summarizing a single plan.
+    """
+    plans = client.find_plans_in_range(start, end)
+    with ThreadPoolExecutor(max_workers=config.pco_max_concurrent_requests) as executor:
+        sections = list(
+            executor.map(lambda p: client.find_plan_snapshot(p.id).sections, plans)
+        )
+    return [_summarize_plan(p, s, messenger, config) for (p, s) in zip(plans, sections)]
+
+
+def get_plan_summary_if_changed(
+    client: PlanningCenterClient,
+    messenger: Messenger,
+    config: Config,
+    dt: date,
+    fingerprint: Optional[str],
+) -> Tuple[str, Optional[PlanSummary]]:
+    """
+    Return a fingerprint of the plan on the given date along with its summary.
+    If the fingerprint matches the given one, the plan hasn't changed and the
+    summary is `None`. Checking the fingerprint is much cheaper than parsing
+    and summarizing the plan.
+    """
     plan = client.find_plan_by_date(dt)
-    sections = client.find_plan_items(
-        plan.id, include_songs=True, include_item_notes=True
+    # The point is to check for changes, so don't reuse an old snapshot
+    snapshot = client.find_plan_snapshot(plan.id, refresh=True)
+    new_fingerprint = _fingerprint_plan(plan, snapshot.items_json)
+    if new_fingerprint == fingerprint:
+        return (new_fingerprint, None)
+    return (
+        new_fingerprint,
+        _summarize_plan(plan, snapshot.sections, messenger, config),
     )
+
+
+def _fingerprint_plan(plan: Plan, items_json: object) -> str:
+    data = json.dumps([repr(plan), items_json], sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _summarize_plan(
+    plan: Plan, sections: List[PlanSection], messenger: Messenger, config: Config
+) -> PlanSummary:
     sections = _remove_unnecessary_notes(sections)
     items = [i for s in sections for i in s.items]
     walk_in_slides = _get_walk_in_slides(
@@ -419,9 +478,7 @@ def get_vocals_notes(
     notes.
     """
     plan = client.find_plan_by_date(dt)
-    sections = client.find_plan_items(
-        plan.id, include_songs=True, include_item_notes=True
-    )
+    sections = client.find_plan_snapshot(plan.id, reader="get_vocals_notes").sections
     songs = _get_songs(sections, note_categories=config.vocals_note_categories)
     return [s for sec in songs for s in sec]
 
@@ -437,6 +494,7 @@ _DARK_ROW_CLS = "odd-row"
 _DIFF_MARKER_CLS = "diff-marker"
 _INSERTION_ROW_CLS = "insertion-row"
 _DELETION_ROW_CLS = "deletion-row"
+_CHANGED_WORDS_CLS = "changed-words"
 _NOTES_TITLE_CLS = "notes-title"
 _NOTES_WARNING_CLS = "notes-warning"
 _COPY_BTN_ID = "copy-btn"
@@ -619,9 +677,82 @@ def _make_songs_table(songs: List[List[Edit[AnnotatedSong]]]) -> HtmlTable:
     )
 
 
+def _split_words(line: str) -> List[str]:
+    return re.findall(r"\w+|\s+|[^\w\s]+", line)
+
+
+def _join_words(edits: List[Edit[str]], keep: Type[Edit[str]]) -> str:
+    """
+    Rebuild one side of a word-level diff, wrapping each run of changed words
+    in a highlight.
+    `keep` is the kind of change to show (`Deletion` for the old line and
+    `Insertion` for the new line).
+    """
+    parts: List[str] = []
+    changed: List[str] = []
+    for e in edits:
+        if isinstance(e, NoOp):
+            if changed:
+                parts.append(
+                    f"<span class='{_CHANGED_WORDS_CLS}'>{''.join(changed)}</span>"
+                )
+                changed = []
+            parts.append(e.val)
+        elif isinstance(e, keep):
+            changed.append(e.val)
+    if changed:
+        parts.append(f"<span class='{_CHANGED_WORDS_CLS}'>{''.join(changed)}</span>")
+    return "".join(parts)
+
+
+def _highlight_changed_words(old: str, new: str) -> Tuple[str, str]:
+    edits = find_diff(old=_split_words(old), new=_split_words(new))
+    # If the lines have no words in common, highlighting every word would
+    # just be noise
+    if not any(isinstance(e, NoOp) and not e.val.isspace() for e in edits):
+        return (old, new)
+    return (_join_words(edits, Deletion), _join_words(edits, Insertion))
+
+
+def _highlight_message_changes(message: List[Edit[str]]) -> List[Edit[str]]:
+    """
+    Highlight the words that changed within each edited line.
+    Within each run of changes, the i-th deleted line is paired with the i-th
+    inserted line, so unchanged lines are never diffed word by word.
+    """
+    result: List[Edit[str]] = []
+    deletions: List[str] = []
+    insertions: List[str] = []
+
+    def flush() -> None:
+        nonlocal deletions, insertions
+        pairs = [
+            _highlight_changed_words(d, i) for (d, i) in zip(deletions, insertions)
+        ]
+        n = len(pairs)
+        result.extend(Deletion(d) for (d, _) in pairs)
+        result.extend(Deletion(d) for d in deletions[n:])
+        result.extend(Insertion(i) for (_, i) in pairs)
+        result.extend(Insertion(i) for i in insertions[n:])
+        deletions = []
+        insertions = []
+
+    for e in message:
+        match e:
+            case Deletion(line):
+                deletions.append(line)
+            case Insertion(line):
+                insertions.append(line)
+            case _:
+                flush()
+                result.append(e)
+    flush()
+    return result
+
+
 def _make_message_table(message: List[Edit[str]]) -> Tuple[str, HtmlTable]:
     rows: List[Edit[List[str]]]
-    rows = [line.map(lambda e: [e]) for line in message]
+    rows = [line.map(lambda e: [e]) for line in _highlight_message_changes(message)]
     has_sermon_notes = len(rows) > 0
     if not has_sermon_notes:
         rows = [NoOp(["<span class='missing'>No notes available</span>"])]
@@ -671,11 +802,17 @@ def plan_summary_diff_to_html(
     summary: PlanSummaryDiff,
     old_plans: List[Tuple[str, str]],
     current_plan_id: str,
-    port: int,
+    latest_summary_id: str,
+    port: Optional[int],
 ) -> str:
     """
     Convert a plan summary diff to an HTML string.
+    `latest_summary_id` identifies the newer of the two summaries; the page
+    uses it to tell whether updates pushed by the server are new to it.
+    If `port` is `None`, there is no server and the page won't check for
+    updates.
     """
+    updates_url = None if port is None else f"http://localhost:{port}/updates"
     title = _escape(_make_page_title(summary.plan))
     subtitle = _escape(summary.plan.date.strftime("%B %d, %Y"))
     walk_in_slides_table = _make_walk_in_slides_list(summary.walk_in_slides)
@@ -718,6 +855,8 @@ def plan_summary_diff_to_html(
                 --dark-green-background-color: hsl(120, 50%, 65%);
                 --light-red-background-color: hsl(0, 50%, 75%);
                 --dark-red-background-color: hsl(0, 50%, 65%);
+                --changed-green-background-color: hsl(120, 50%, 55%);
+                --changed-red-background-color: hsl(0, 50%, 55%);
             }}
             body {{
                 margin: 0;
@@ -810,6 +949,15 @@ def plan_summary_diff_to_html(
             .{_DARK_ROW_CLS}.{_DELETION_ROW_CLS} {{
                 background-color: var(--dark-red-background-color);
             }}
+            .{_INSERTION_ROW_CLS} .{_CHANGED_WORDS_CLS} {{
+                background-color: var(--changed-green-background-color);
+                font-weight: bold;
+            }}
+            .{_DELETION_ROW_CLS} .{_CHANGED_WORDS_CLS} {{
+                background-color: var(--changed-red-background-color);
+                font-weight: bold;
+                text-decoration: line-through;
+            }}
             #{_COPY_BTN_ID} {{
                 font-size: large;
                 padding: 5px 10px;
@@ -849,42 +997,48 @@ def plan_summary_diff_to_html(
 {_indent(message_warnings_table.to_css(),3)}
         </style>
         <script>
-            const MILLISECONDS_PER_MINUTE = 60 * 1000;
-            const INTERVAL_ID = setInterval(checkForUpdates, MILLISECONDS_PER_MINUTE);
-            const BACKEND_URL = "http://localhost:{port}/summaries";
+            const SUMMARY_ID = {json.dumps(latest_summary_id)};
+            const UPDATES_URL = {json.dumps(updates_url)};
 
             document.addEventListener("DOMContentLoaded", () => {{
-                checkForUpdates();
+                if (UPDATES_URL === null) {{
+                    const STATUS_ELEM = document.getElementById("summary-status");
+                    STATUS_ELEM.textContent = "This summary does not check for updates.";
+                    setLastUpdateTime();
+                }} else {{
+                    listenForUpdates();
+                }}
             }});
 
-            async function checkForUpdates() {{
+            // The server checks for updates and pushes the result to every
+            // open page
+            function listenForUpdates() {{
                 const STATUS_ELEM = document.getElementById("summary-status");
                 STATUS_ELEM.textContent = "Checking for updates...";
                 STATUS_ELEM.className = "";
-                try {{
-                    const response = await fetch(BACKEND_URL, {{method: "POST"}});
-                    if (response.ok) {{
-                        const body = await response.json();
-                        if (body.changes) {{
-                            const message = "There are changes to the plan! Reload the page to see the newest summary."
-                            STATUS_ELEM.innerHTML = `⚠️ ${{message}} ⚠️`;
-                            document.documentElement.style.setProperty("--header-color", "{HEADER_CHANGE}");
-                            clearInterval(INTERVAL_ID);
-                            alert(message);
-                        }} else {{
-                            STATUS_ELEM.textContent = "The summary is up to date.";
-                            document.documentElement.style.setProperty("--header-color", "{HEADER_OK}");
-                        }}
-                    }} else {{
+                const source = new EventSource(UPDATES_URL);
+                source.onmessage = (event) => {{
+                    const body = JSON.parse(event.data);
+                    if (body.latest !== null && body.latest !== SUMMARY_ID) {{
+                        const message = "There are changes to the plan! Reload the page to see the newest summary."
+                        STATUS_ELEM.innerHTML = `⚠️ ${{message}} ⚠️`;
+                        document.documentElement.style.setProperty("--header-color", "{HEADER_CHANGE}");
+                        source.close();
+                        alert(message);
+                    }} else if (body.error) {{
                         STATUS_ELEM.innerHTML = "⚠️ Failed to check for updates. ⚠️";
                         document.documentElement.style.setProperty("--header-color", "{HEADER_ERROR}");
+                    }} else {{
+                        STATUS_ELEM.textContent = "The summary is up to date.";
+                        document.documentElement.style.setProperty("--header-color", "{HEADER_OK}");
                     }}
-                }} catch (e) {{
-                    console.error(e);
+                    setLastUpdateTime();
+                }};
+                // The browser will keep trying to reconnect
+                source.onerror = () => {{
                     STATUS_ELEM.innerHTML = "⚠️ Failed to check for updates. ⚠️";
                     document.documentElement.style.setProperty("--header-color", "{HEADER_ERROR}");
-                }}
-                setLastUpdateTime();
+                }};
             }}
 
             function setOldPlanId() {{
@@ -1057,7 +1211,7 @@ def vocals_notes_to_html(songs: List[AnnotatedSong]) -> str:
 def plan_summary_to_json(summary: PlanSummary) -> str:
     """
     Convert the plan summary to a JSON string.
-    This is the inverse of `load_plan_summary`.
+    This is the inverse of `plan_summary_from_json`.
     """
     json_summary = {
         "plan": _plan_to_json(summary.plan),
@@ -1076,8 +1230,15 @@ def load_plan_summary(path: Path) -> PlanSummary:
     """
     Load a plan summary from a JSON file.
     """
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    return plan_summary_from_json(path.read_text(encoding="utf-8"))
+
+
+def plan_summary_from_json(text: str) -> PlanSummary:
+    """
+    Parse a plan summary from a JSON string.
+    This is the inverse of `plan_summary_to_json`.
+    """
+    data = json.loads(text)
     opener_vid = (
         _parse_annotated_item(data["opener_video"]) if "opener_video" in data else None
     )
@@ -1,12 +1,18 @@
+import functools
+import hashlib
+import json
 import os
 import signal
 import sys
+import threading
 import time
 import traceback
 from argparse import ArgumentParser, Namespace
-from datetime import datetime
+from datetime import date, datetime
 from pathlib import Path
-from typing import Callable, List, Optional
+from socketserver import ThreadingMixIn
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from wsgiref import simple_server
 
 import autochecklist
 import bottle  # pyright: ignore[reportMissingTypeStubs]
@@ -16,7 +22,12 @@ from args import ReccArgs
 from autochecklist import Messenger, ProblemLevel, TaskModel, TaskStatus
 from config import Config
 from external_services import PlanningCenterClient
-from lib import PlanSummary, ReccDependencyProvider, SimplifiedMessengerSettings
+from lib import (
+    PlanSummary,
+    PlanSummaryStore,
+    ReccDependencyProvider,
+    SimplifiedMessengerSettings,
+)
 
 _DEMO_FILE_1 = Path(__file__).parent.joinpath(
     "test", "integration", "summarize_plan_data", "20240414_summary.json"
@@ -24,6 +35,9 @@ _DEMO_FILE_1 = Path(__file__).parent.joinpath(
 _DEMO_FILE_2 = Path(__file__).parent.joinpath(
     "test", "integration", "summarize_plan_data", "20240414_summary_edited.json"
 )
+# How often to send a comment down idle event streams, so that closed
+# connections are noticed
+_KEEP_ALIVE_SECONDS = 15
 
 
 class SummarizePlanArgs(ReccArgs):
@@ -35,9 +49,12 @@ class SummarizePlanArgs(ReccArgs):
         self.demo: bool = args.demo
         self.port: int = args.port
         self.clean: bool = args.clean
+        self.through: Optional[date] = args.through
         super().__init__(args, error)
-        if self.clean:
+        if self.clean or self.through is not None:
             self.auto_close = True
+        if self.through is not None and self.through < self.start_time.date():
+            error("The --through date must not be before the start date.")
 
     @classmethod
     def set_up_parser(cls, parser: ArgumentParser) -> None:
@@ -62,6 +79,11 @@ class SummarizePlanArgs(ReccArgs):
             action="store_true",
             help="Delete all old plan summaries and exit.",
         )
+        parser.add_argument(
+            "--through",
+            type=lambda x: datetime.strptime(x, "%Y-%m-%d").date(),
+            help="Summarize every plan from today (or --date) through this date (YYYY-MM-DD), save the summaries as web pages, and exit.",
+        )
         return super().set_up_parser(parser)
 
 
@@ -91,7 +113,21 @@ global_pco_client: PlanningCenterClient
 global_messenger: Messenger
 global_args: SummarizePlanArgs
 global_config: Config
+global_store: PlanSummaryStore
 global_server_started = False
+# The most recent summary and a fingerprint of the plan it was generated from.
+# Keeping these in memory means that checking for updates only requires
+# fetching the plan, as long as nothing has changed.
+global_latest_summary: Optional[PlanSummary] = None
+global_latest_fingerprint: Optional[str] = None
+# Result of the latest check for updates, which is pushed to every open page.
+# The version is incremented after each check.
+global_update_condition = threading.Condition()
+global_update_version = 0
+global_update_event: Dict[str, object] = {}
+# Number of pages connected to the event stream. Planning Center is only
+# checked while at least one page is listening.
+global_subscriber_count = 0
 
 
 def summarize_plan(
@@ -100,44 +136,58 @@ def summarize_plan(
     args: SummarizePlanArgs,
     config: Config,
 ) -> None:
-    global global_pco_client, global_messenger, global_args, global_config, global_server_started
+    global global_pco_client, global_messenger, global_args, global_config, global_store, global_server_started
     global_pco_client = pco_client
     global_messenger = messenger
     global_args = args
     global_config = config
 
     config.plan_summaries_dir.mkdir(exist_ok=True, parents=True)
+    global_store = PlanSummaryStore(_get_db_file(config))
 
     if args.clean:
-        _delete_old_plan_summaries(config.plan_summaries_dir)
+        global_store.delete_day(_today())
+        return
+
+    if args.through is not None:
+        _summarize_range(
+            pco_client=pco_client,
+            messenger=messenger,
+            config=config,
+            start=config.start_time.date(),
+            end=args.through,
+        )
         return
 
     if args.demo:
         s = lib.load_plan_summary(_DEMO_FILE_1)
-        _save_summary(s, config.plan_summaries_dir)
+        global_store.add(s)
         messenger.log_problem(
             ProblemLevel.WARN,
             "The script is running in demo mode, so it will not check Planning Center."
             f" The plan will instead be loaded from {_DEMO_FILE_2.resolve().as_posix()}",
         )
 
-    latest_summary_path = _find_latest_summary(config.plan_summaries_dir)
-    if latest_summary_path is not None:
+    latest_summary_id = global_store.latest_id(_today())
+    if latest_summary_id is not None:
         messenger.log_status(
             TaskStatus.RUNNING,
-            f"A plan summary already exists at {latest_summary_path.resolve().as_posix()}.",
+            f"A plan summary already exists (ID {latest_summary_id} in {_get_db_file(config).resolve().as_posix()}).",
         )
     else:
-        summary = _generate_summary(
+        fingerprint, summary = _generate_summary_if_changed(
             pco_client=pco_client,
             messenger=messenger,
             args=args,
             config=config,
+            fingerprint=None,
         )
-        new_summary_path = _save_summary(summary, config.plan_summaries_dir)
+        assert summary is not None
+        _remember_summary(summary, fingerprint)
+        new_summary_id = global_store.add(summary)
         messenger.log_status(
             TaskStatus.RUNNING,
-            f"Saved summary to {new_summary_path.resolve().as_posix()}.",
+            f"Saved summary (ID {new_summary_id} in {_get_db_file(config).resolve().as_posix()}).",
         )
 
     if not args.no_open:
@@ -160,8 +210,75 @@ def summarize_plan(
             TaskStatus.RUNNING,
             f"Listening for changes on http://localhost:{args.port}.",
         )
+        # Check for updates in one place, no matter how many pages are open
+        threading.Thread(
+            target=_poll_for_updates,
+            name="PlanSummaryUpdatePoller",
+            daemon=True,
+        ).start()
         global_server_started = True
-        bottle.run(host="localhost", port=args.port, debug=True)
+        bottle.run(
+            host="localhost",
+            port=args.port,
+            debug=True,
+            server=_ThreadingServer,  # pyright: ignore[reportArgumentType]
+        )
+
+
+def _summarize_range(
+    pco_client: PlanningCenterClient,
+    messenger: Messenger,
+    config: Config,
+    start: date,
+    end: date,
+) -> None:
+    summaries = lib.get_plan_summaries(
+        client=pco_client, messenger=messenger, config=config, start=start, end=end
+    )
+    if not summaries:
+        raise ValueError(
+            f"No plans found from {start.strftime('%Y-%m-%d')} to {end.strftime('%Y-%m-%d')}."
+        )
+    for s in summaries:
+        diff = lib.diff_plan_summaries(old=s, new=s)
+        page = lib.plan_summary_diff_to_html(
+            diff, old_plans=[], current_plan_id="", latest_summary_id="", port=None
+        )
+        f = config.plan_summaries_dir.joinpath(
+            f"{s.plan.date.strftime('%Y-%m-%d')}_{s.plan.id.plan}.html"
+        )
+        f.write_text(page, encoding="utf-8")
+        messenger.log_status(
+            TaskStatus.RUNNING,
+            f"Saved summary of {s.plan.service_type_name} on {s.plan.date.strftime('%Y-%m-%d')} to {f.resolve().as_posix()}.",
+        )
+    messenger.log_status(TaskStatus.DONE, f"Summarized {len(summaries)} plan(s).")
+
+
+class _ThreadingServer(bottle.ServerAdapter):
+    """
+    Similar to Bottle's default server, except that each request is handled in
+    its own thread. Otherwise a single open event stream would block every
+    other request.
+    """
+
+    def run(self, handler: Any) -> None:
+        class _Server(ThreadingMixIn, simple_server.WSGIServer):
+            daemon_threads = True
+
+        class _QuietHandler(simple_server.WSGIRequestHandler):
+            def log_message(self, format: str, *args: Any) -> None:
+                # The Bottle app would otherwise log every request
+                pass
+
+        server = simple_server.make_server(
+            self.host,
+            self.port,
+            handler,
+            server_class=_Server,
+            handler_class=_QuietHandler,
+        )
+        server.serve_forever()
 
 
 @bottle.hook("after_request")
@@ -169,35 +286,99 @@ def _enable_cors() -> None:  # pyright: ignore[reportUnusedFunction]
     bottle.response.headers["Access-Control-Allow-Origin"] = "*"
 
 
-@bottle.post("/summaries")
-def _check_for_updates() -> object:  # pyright: ignore[reportUnusedFunction]
-    try:
-        prev_summary_path = _find_latest_summary(global_config.plan_summaries_dir)
+@bottle.get("/updates")
+def _stream_updates() -> Iterator[str]:  # pyright: ignore[reportUnusedFunction]
+    """
+    Push the result of each check for updates to the page as Server-Sent
+    Events.
+    """
+    bottle.response.content_type = "text/event-stream"
+    bottle.response.headers["Cache-Control"] = "no-cache"
+
+    def stream() -> Iterator[str]:
+        global global_subscriber_count
+        with global_update_condition:
+            global_subscriber_count += 1
+            # Wake up the poller if it was waiting for someone to listen
+            global_update_condition.notify_all()
+        try:
+            # Wait for the first check to finish if it hasn't already
+            last_version = 0
+            while True:
+                with global_update_condition:
+                    global_update_condition.wait_for(
+                        lambda: global_update_version != last_version,
+                        timeout=_KEEP_ALIVE_SECONDS,
+                    )
+                    version = global_update_version
+                    event = global_update_event
+                if version == last_version:
+                    yield ": keep-alive\n\n"
+                else:
+                    last_version = version
+                    yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            # The server closes the stream once the page disconnects
+            with global_update_condition:
+                global_subscriber_count -= 1
+
+    return stream()
+
+
+def _poll_for_updates() -> None:
+    global global_update_version, global_update_event
+    while True:
+        with global_update_condition:
+            global_update_condition.wait_for(lambda: global_subscriber_count > 0)
+        try:
+            if _check_for_updates():
+                global_messenger.log_debug("The plan changed. Saved a new summary.")
+            error = False
+        except Exception as e:
+            global_messenger.log_problem(
+                ProblemLevel.ERROR,
+                f"An error occurred while checking for updates: {e} ({type(e).__name__})",
+                traceback.format_exc(),
+            )
+            error = True
+        latest_summary_id = global_store.latest_id(_today())
+        with global_update_condition:
+            global_update_version += 1
+            global_update_event = {"latest": latest_summary_id, "error": error}
+            global_update_condition.notify_all()
+        time.sleep(global_config.plan_summary_update_interval_seconds)
+
+
+def _check_for_updates() -> bool:
+    """
+    Generate a new summary and save it if the plan changed.
+    Return `True` if there were changes.
+    """
+    fingerprint, new_summary = _generate_summary_if_changed(
+        pco_client=global_pco_client,
+        messenger=global_messenger,
+        args=global_args,
+        config=global_config,
+        fingerprint=global_latest_fingerprint,
+    )
+    if new_summary is None:
+        return False
+    prev_summary = global_latest_summary
+    if prev_summary is None:
+        # The summary was saved by a previous run of the script
+        prev_summary_id = global_store.latest_id(_today())
         prev_summary = (
-            None
-            if prev_summary_path is None
-            else lib.load_plan_summary(prev_summary_path)
+            None if prev_summary_id is None else global_store.load(prev_summary_id)
         )
-        new_summary = _generate_summary(
-            pco_client=global_pco_client,
-            messenger=global_messenger,
-            args=global_args,
-            config=global_config,
-        )
-        changes = (
-            True
-            if prev_summary is None
-            else lib.diff_plan_summaries(old=prev_summary, new=new_summary).plan_changed
-        )
-        if changes:
-            _save_summary(new_summary, global_config.plan_summaries_dir)
-        return {"changes": changes}
-    except Exception as e:
-        global_messenger.log_problem(
-            ProblemLevel.ERROR,
-            f"An error occurred while checking for updates: {e} ({type(e).__name__})",
-        )
-        raise
+    changes = (
+        True
+        if prev_summary is None
+        else lib.diff_plan_summaries(old=prev_summary, new=new_summary).plan_changed
+    )
+    if changes:
+        global_store.add(new_summary)
+    _remember_summary(new_summary, fingerprint)
+    return changes
 
 
 @bottle.get("/plan-summary.html")
@@ -206,30 +387,20 @@ def _get_summary_diff() -> str:  # pyright: ignore[reportUnusedFunction]
         old_summary_id = (
             bottle.request.query.old  # pyright: ignore[reportUnknownMemberType, reportAttributeAccessIssue]
         )
-        new_summary_path = _find_latest_summary(global_config.plan_summaries_dir)
-        if new_summary_path is None:
-            return f"No plan summaries have been generated yet (in {global_config.plan_summaries_dir.resolve().as_posix()})."
+        new_summary_id = global_store.latest_id(_today())
+        if new_summary_id is None:
+            return f"No plan summaries have been generated yet (in {_get_db_file(global_config).resolve().as_posix()})."
         if not old_summary_id:
-            old_id = new_summary_path.stem
-            bottle.redirect(f"/plan-summary.html?old={old_id}")
-        new_summary = lib.load_plan_summary(new_summary_path)
-        old_summary_path = (
-            new_summary_path
-            if old_summary_id == "latest"
-            else global_config.plan_summaries_dir.joinpath(f"{old_summary_id}.json")
-        )
-        old_summary = lib.load_plan_summary(old_summary_path)
-        diff = lib.diff_plan_summaries(old=old_summary, new=new_summary)
-        old_plans = [
-            (p.stem, _friendly_plan_name(p))
-            for p in _list_existing_summaries(global_config.plan_summaries_dir)
-        ]
-        return lib.plan_summary_diff_to_html(
-            diff,
-            old_plans=old_plans,
-            current_plan_id=old_summary_id,
-            port=global_args.port,
-        )
+            bottle.redirect(f"/plan-summary.html?old={new_summary_id}")
+        page, etag = _render_summary_diff(old_summary_id, new_summary_id)
+        bottle.response.set_header("ETag", etag)
+        # Let the browser keep a copy, but have it check with the server
+        # before using it
+        bottle.response.set_header("Cache-Control", "no-cache")
+        if bottle.request.get_header("If-None-Match") == etag:
+            bottle.response.status = 304
+            return ""
+        return page
     except bottle.BottleException:
         # This is what redirect() raises, so it's probably not a problem
         raise
@@ -241,48 +412,85 @@ def _get_summary_diff() -> str:  # pyright: ignore[reportUnusedFunction]
         raise
 
 
+# Summaries are never modified once saved, so the page for a given pair of
+# summaries can be reused until a newer summary comes along
+@functools.lru_cache(maxsize=32)
+def _render_summary_diff(old_summary_id: str, new_summary_id: str) -> Tuple[str, str]:
+    """
+    Render the page comparing the two given summaries.
+    Return the HTML and its ETag.
+    """
+    new_summary = global_store.load(new_summary_id)
+    old_summary = (
+        new_summary
+        if old_summary_id in {"latest", new_summary_id}
+        else global_store.load(old_summary_id)
+    )
+    diff = lib.diff_plan_summaries(old=old_summary, new=new_summary)
+    old_plans = [
+        (id, _friendly_plan_name(id))
+        for id in global_store.list_ids(_today())
+        # Summaries from later in the day are irrelevant
+        if id <= new_summary_id
+    ]
+    page = lib.plan_summary_diff_to_html(
+        diff,
+        old_plans=old_plans,
+        current_plan_id=old_summary_id,
+        latest_summary_id=new_summary_id,
+        port=global_args.port,
+    )
+    etag = f'"{hashlib.sha256(page.encode("utf-8")).hexdigest()}"'
+    return (page, etag)
+
+
 def _stop_server():
     if global_server_started:
         my_pid = os.getpid()
         os.kill(my_pid, signal.SIGTERM)
 
 
-def _generate_summary(
+def _generate_summary_if_changed(
     pco_client: PlanningCenterClient,
     messenger: Messenger,
     args: SummarizePlanArgs,
     config: Config,
-) -> PlanSummary:
+    fingerprint: Optional[str],
+) -> Tuple[str, Optional[PlanSummary]]:
     """
-    Generate a summary of the current plan on Planning Center Online.
+    Generate a summary of the current plan on Planning Center Online, unless
+    its fingerprint matches the given one.
     """
     if args.demo:
-        return lib.load_plan_summary(_DEMO_FILE_2)
+        new_fingerprint = hashlib.sha256(_DEMO_FILE_2.read_bytes()).hexdigest()
+        if new_fingerprint == fingerprint:
+            return (new_fingerprint, None)
+        return (new_fingerprint, lib.load_plan_summary(_DEMO_FILE_2))
     else:
-        return lib.get_plan_summary(
+        return lib.get_plan_summary_if_changed(
             client=pco_client,
             messenger=messenger,
             config=config,
             dt=config.start_time.date(),
+            fingerprint=fingerprint,
         )
 
 
-def _save_summary(summary: PlanSummary, dir: Path) -> Path:
-    choose_fname = lambda: f"{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
-    json_path = dir.joinpath(choose_fname())
+def _remember_summary(summary: PlanSummary, fingerprint: str) -> None:
+    global global_latest_summary, global_latest_fingerprint
+    global_latest_summary = summary
+    global_latest_fingerprint = fingerprint
 
-    # Avoid overwriting a previous summary
-    if json_path.exists():
-        time.sleep(2)
-        json_path = dir.joinpath(choose_fname())
-    assert not json_path.exists()
 
-    json_path.write_text(lib.plan_summary_to_json(summary))
-    return json_path
+def _get_db_file(config: Config) -> Path:
+    return config.plan_summaries_dir.joinpath("plan_summaries.sqlite3")
 
 
-def _friendly_plan_name(p: Path) -> str:
-    id = p.stem
+def _today() -> date:
+    return datetime.now().date()
+
+
+def _friendly_plan_name(id: str) -> str:
     assert len(id) == 14
     hour = id[8:10]
     minute = id[10:12]
@@ -290,25 +498,6 @@ def _friendly_plan_name(p: Path) -> str:
     return f"{hour}:{minute}:{second}"
 
 
-def _list_existing_summaries(dir: Path) -> List[Path]:
-    today = datetime.now().strftime("%Y%m%d")
-    time_pattern = "[0123456789]" * 6
-    return sorted(dir.glob(f"{today}{time_pattern}.json"))
-
-
-def _delete_old_plan_summaries(dir: Path) -> None:
-    files = _list_existing_summaries(dir)
-    for f in files:
-        # It would be weird for the file to not exist, but why should it cause
-        # the app to crash?
-        f.unlink(missing_ok=True)
-
-
-def _find_latest_summary(dir: Path) -> Optional[Path]:
-    files = _list_existing_summaries(dir)
-    return None if not files else files[-1]
-
-
 if __name__ == "__main__":
     _args = SummarizePlanArgs.parse(sys.argv)
     _cfg = Config(_args)
@@ -10,7 +10,12 @@ from autochecklist import Messenger
 from captions import Cue
 from config import Config
 from dateutil.tz import tzutc
-from external_services import Credential, CredentialStore, InputPolicy
+from external_services import (
+    Credential,
+    CredentialStore,
+    HttpSessionProvider,
+    InputPolicy,
+)
 from external_services.boxcast import BoxCastApiClient, Broadcast
 
 _BROADCAST_20240505_ID = "orn5qh81x7dojxwlbbng"
@@ -142,6 +147,7 @@ def _set_up_dependencies(
         messenger=messenger,
         credential_store=credential_store,
         config=config,
+        http=HttpSessionProvider(config),
         lazy_login=lazy_login,
     )
     return (client, log_problem_mock, credential_store)
@@ -1,12 +1,15 @@
 # pyright: reportPrivateUsage=false
 
+import dataclasses
 import shutil
+import tempfile
 import unittest
 from pathlib import Path
-from typing import Dict, Optional
-from unittest.mock import create_autospec
+from typing import Dict, Optional, Union
+from unittest.mock import create_autospec, patch
 
 import download_pco_assets as dpa
+import lib.asset_index
 from args import ReccArgs
 from autochecklist import CancellationToken, Messenger, ProblemLevel
 from config import Config
@@ -19,7 +22,9 @@ from lib import (
     DownloadPlan,
     DownloadSkipped,
     DownloadSucceeded,
+    DownloadUnchanged,
 )
+from lib.asset_index import hash_file
 
 _TEST_DIR = Path(__file__).resolve().parent.parent
 _DATA_DIR = Path(__file__).parent.joinpath("download_assets_data")
@@ -202,8 +207,21 @@ class DownloadAssetsTestCase(unittest.TestCase):
         if self._MCR_CONFIG.assets_by_type_dir.is_dir():
             shutil.rmtree(self._MCR_CONFIG.assets_by_type_dir)
 
+        # Keep the asset index and attachment manifest out of the repo and
+        # start every test without them
+        self._cache_dir = self._temp_cache_dir()
+        for config in [self._FOH_CONFIG, self._MCR_CONFIG]:
+            p = patch.object(config, "cache_dir", self._cache_dir)
+            p.start()
+            self.addCleanup(p.stop)
+
         self.maxDiff = None
 
+    def _temp_cache_dir(self) -> Path:
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        return Path(temp_dir.name)
+
     def test_plan_all_mcr(self) -> None:
         attachments = {
             _KIDS_VID,
@@ -810,7 +828,7 @@ class DownloadAssetsTestCase(unittest.TestCase):
         manager = AssetManager(config)
         pco_client = create_autospec(PlanningCenterClient)
         pco_client.download_attachments = _fake_download
-        pco_client.find_attachments.return_value = {
+        pco_client.find_plan_snapshot.return_value.attachments = {
             _KIDS_VID,
             _BUMPER_VID,
             _OPENER_VID,
@@ -865,7 +883,7 @@ class DownloadAssetsTestCase(unittest.TestCase):
         messenger.log_problem.assert_not_called()
 
         # Check that deduplication works properly
-        pco_client.find_attachments.return_value = {
+        pco_client.find_plan_snapshot.return_value.attachments = {
             _KIDS_VID,
             _SERMON_NOTES_DOCX,
             _SERIES_TITLE_IMG_COPY_NEW_NAME,
@@ -924,7 +942,7 @@ class DownloadAssetsTestCase(unittest.TestCase):
         manager = AssetManager(config)
         pco_client = create_autospec(PlanningCenterClient)
         pco_client.download_attachments = _fake_download
-        pco_client.find_attachments.return_value = {
+        pco_client.find_plan_snapshot.return_value.attachments = {
             _KIDS_VID,
             _BUMPER_VID,
             _OPENER_VID,
@@ -975,7 +993,7 @@ class DownloadAssetsTestCase(unittest.TestCase):
         messenger.log_problem.assert_not_called()
 
         # Check that deduplication works properly
-        pco_client.find_attachments.return_value = {
+        pco_client.find_plan_snapshot.return_value.attachments = {
             _KIDS_VID,
             _SERMON_NOTES_DOCX,
             _SERIES_TITLE_IMG_COPY_NEW_NAME,
@@ -1025,6 +1043,163 @@ class DownloadAssetsTestCase(unittest.TestCase):
         self.assertEqual(expected_files, actual_files)
         messenger.log_problem.assert_not_called()
 
+    def test_unchanged_attachments_not_downloaded_again(self) -> None:
+        config = self._MCR_CONFIG
+        kids_vid = dataclasses.replace(_KIDS_VID, updated_at="2024-04-08T15:00:00Z")
+        bumper_vid = dataclasses.replace(_BUMPER_VID, updated_at="2024-04-09T15:00:00Z")
+        pco_client = create_autospec(PlanningCenterClient)
+        pco_client.download_attachments = _fake_download
+        pco_client.find_plan_snapshot.return_value.attachments = {
+            kids_vid,
+            bumper_vid,
+            # Without a timestamp, there's no way to tell whether these have
+            # changed
+            _ANNOUNCEMENT_VID,
+            _SERMON_NOTES_DOCX,
+        }
+        messenger = create_autospec(Messenger)
+        kids_vid_path = config.assets_by_service_dir.joinpath(
+            "Kids_OnlineExperience_W2.mp4"
+        )
+        bumper_vid_path = config.videos_dir.joinpath("Worthy Sermon Bumper.mp4")
+        announcement_vid_result = DownloadSucceeded(
+            config.assets_by_service_dir.joinpath("Announcement Video 2024-04-14.mov")
+        )
+        sermon_notes_result = DownloadSucceeded(
+            config.assets_by_service_dir.joinpath(
+                "Notes - Worthy - Week 2 - Worthy Of The Feast.docx"
+            )
+        )
+        results = AssetManager(config).download_pco_assets(
+            client=pco_client, messenger=messenger
+        )
+        self.assertEqual(
+            {
+                kids_vid: DownloadSucceeded(kids_vid_path),
+                bumper_vid: DownloadSucceeded(bumper_vid_path),
+                _ANNOUNCEMENT_VID: announcement_vid_result,
+                _SERMON_NOTES_DOCX: sermon_notes_result,
+            },
+            results,
+        )
+
+        # Use a fresh object to make sure the manifest is read from disk
+        results = AssetManager(config).download_pco_assets(
+            client=pco_client, messenger=messenger
+        )
+        self.assertEqual(
+            {
+                kids_vid: DownloadUnchanged(
+                    reason="unchanged since last download",
+                    existing=kids_vid_path.resolve(),
+                ),
+                bumper_vid: DownloadUnchanged(
+                    reason="unchanged since last download",
+                    existing=bumper_vid_path.resolve(),
+                ),
+                _ANNOUNCEMENT_VID: announcement_vid_result,
+                _SERMON_NOTES_DOCX: sermon_notes_result,
+            },
+            results,
+        )
+
+        # Attachments that changed on Planning Center or locally should be
+        # downloaded again
+        kids_vid_path.unlink()
+        new_bumper_vid = dataclasses.replace(
+            bumper_vid, updated_at="2024-04-10T15:00:00Z"
+        )
+        pco_client.find_plan_snapshot.return_value.attachments = {
+            kids_vid,
+            new_bumper_vid,
+            _ANNOUNCEMENT_VID,
+            _SERMON_NOTES_DOCX,
+        }
+        results = AssetManager(config).download_pco_assets(
+            client=pco_client, messenger=messenger
+        )
+        self.assertEqual(
+            {
+                kids_vid: DownloadSucceeded(kids_vid_path),
+                new_bumper_vid: DownloadDeduplicated(original=bumper_vid_path),
+                _ANNOUNCEMENT_VID: announcement_vid_result,
+                _SERMON_NOTES_DOCX: sermon_notes_result,
+            },
+            results,
+        )
+        messenger.log_problem.assert_not_called()
+
+    def test_fresh_download_not_hashed_again(self) -> None:
+        config = self._FOH_CONFIG
+        bumper_vid = dataclasses.replace(_BUMPER_VID, updated_at="2024-04-09T15:00:00Z")
+        pco_client = create_autospec(PlanningCenterClient)
+        pco_client.download_attachments = _fake_download_with_hash
+        pco_client.find_plan_snapshot.return_value.attachments = {bumper_vid}
+        messenger = create_autospec(Messenger)
+        bumper_vid_path = config.videos_dir.joinpath("Worthy Sermon Bumper.mp4")
+
+        with patch.object(
+            lib.asset_index, "hash_file", wraps=lib.asset_index.hash_file
+        ) as hash_file:
+            results = AssetManager(config).download_pco_assets(
+                client=pco_client, messenger=messenger
+            )
+            self.assertEqual({bumper_vid: DownloadSucceeded(bumper_vid_path)}, results)
+            # Use a fresh object to make sure the index is read from disk
+            results = AssetManager(config).download_pco_assets(
+                client=pco_client, messenger=messenger
+            )
+            self.assertEqual(
+                {
+                    bumper_vid: DownloadUnchanged(
+                        reason="unchanged since last download",
+                        existing=bumper_vid_path.resolve(),
+                    )
+                },
+                results,
+            )
+        # The hash from the download should be enough
+        hash_file.assert_not_called()
+
+    def test_unchanged_attachments_not_hashed_again(self) -> None:
+        config = self._MCR_CONFIG
+        ts = "2024-04-09T15:00:00Z"
+        attachments = {
+            # Not deduplicated
+            dataclasses.replace(_KIDS_VID, updated_at=ts),
+            dataclasses.replace(_ANNOUNCEMENT_VID, updated_at=ts),
+            dataclasses.replace(_SERMON_NOTES_DOCX, updated_at=ts),
+            # Deduplicated
+            dataclasses.replace(_BUMPER_VID, updated_at=ts),
+        }
+        pco_client = create_autospec(PlanningCenterClient)
+        pco_client.download_attachments = _fake_download_with_hash
+        pco_client.find_plan_snapshot.return_value.attachments = attachments
+        messenger = create_autospec(Messenger)
+
+        with patch.object(
+            lib.asset_index, "hash_file", wraps=lib.asset_index.hash_file
+        ) as hash_file:
+            results = AssetManager(config).download_pco_assets(
+                client=pco_client, messenger=messenger
+            )
+            self.assertTrue(
+                all(isinstance(r, DownloadSucceeded) for r in results.values()),
+                results,
+            )
+            # Run twice so that the index has to be saved even when nothing
+            # is downloaded
+            for _ in range(2):
+                results = AssetManager(config).download_pco_assets(
+                    client=pco_client, messenger=messenger
+                )
+                self.assertTrue(
+                    all(isinstance(r, DownloadUnchanged) for r in results.values()),
+                    results,
+                )
+        hash_file.assert_not_called()
+        messenger.log_problem.assert_not_called()
+
     def test_full_download_via_script(self) -> None:
         """
         The dedicated download_pco_assets.py script should go ahead and
@@ -1040,10 +1215,11 @@ class DownloadAssetsTestCase(unittest.TestCase):
             profile="mcr_dev",
             allow_multiple_only_for_testing=True,
         )
+        config.cache_dir = self._cache_dir
         messenger = create_autospec(Messenger)
         pco_client = create_autospec(PlanningCenterClient)
         pco_client.download_attachments = _fake_download
-        pco_client.find_attachments.return_value = {
+        pco_client.find_plan_snapshot.return_value.attachments = {
             # Notice how the kids video, announcements video, and sermon notes
             # are all missing
             _BUMPER_VID,
@@ -1135,3 +1311,13 @@ async def _fake_download(
         }[a]
         shutil.copy(src, p)
     return {p: None for p in downloads.keys()}
+
+
+async def _fake_download_with_hash(
+    downloads: Dict[Path, Attachment],
+    messenger: Messenger,
+    cancellation_token: Optional[CancellationToken],
+) -> Dict[Path, Union[str, None, BaseException]]:
+    """Like `_fake_download`, but report each file's hash like a real download."""
+    await _fake_download(downloads, messenger, cancellation_token)
+    return {p: hash_file(p) for p in downloads.keys()}
@@ -6,7 +6,12 @@ from unittest.mock import create_autospec
 from args import ReccArgs
 from autochecklist import Messenger
 from config import McrSetupConfig
-from external_services import CredentialStore, InputPolicy, PlanningCenterClient
+from external_services import (
+    CredentialStore,
+    HttpSessionProvider,
+    InputPolicy,
+    PlanningCenterClient,
+)
 from lib import mcr_setup
 
 
@@ -70,5 +75,6 @@ def _create_services(dt: date) -> Tuple[McrSetupConfig, PlanningCenterClient]:
         messenger=messenger,
         credential_store=credential_store,
         config=config,
+        http=HttpSessionProvider(config),
     )
     return (config, client)
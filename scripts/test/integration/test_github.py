@@ -5,7 +5,7 @@ from datetime import date, datetime, timedelta, timezone
 import external_services
 from args import ReccArgs
 from config import Config
-from external_services import IssueType
+from external_services import HttpSessionProvider, IssueType
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.firefox.options import Options
@@ -19,8 +19,11 @@ class GitHubTestCase(unittest.TestCase):
         # when we're running tests anyway
         sunday = _get_latest_sunday()
         expected_title = f"FOH Video Setup (Sunday, {sunday.strftime('%B')} {_day_with_suffix(sunday.day)})"
+        config = _get_config()
         issue = external_services.find_latest_github_issue(
-            type=IssueType.FOH_VIDEO_SETUP, config=_get_config()
+            type=IssueType.FOH_VIDEO_SETUP,
+            config=config,
+            http=HttpSessionProvider(config),
         )
         self.assertEqual(expected_title, issue.title)
         self._check_web_page(url=issue.html_url, expected_title=expected_title)
@@ -30,8 +33,11 @@ class GitHubTestCase(unittest.TestCase):
         # when we're running tests anyway
         sunday = _get_latest_sunday()
         expected_title = f"MCR Video Setup (Sunday, {sunday.strftime('%B')} {_day_with_suffix(sunday.day)})"
+        config = _get_config()
         issue = external_services.find_latest_github_issue(
-            type=IssueType.MCR_VIDEO_SETUP, config=_get_config()
+            type=IssueType.MCR_VIDEO_SETUP,
+            config=config,
+            http=HttpSessionProvider(config),
         )
         self.assertEqual(expected_title, issue.title)
         self._check_web_page(url=issue.html_url, expected_title=expected_title)
@@ -41,8 +47,11 @@ class GitHubTestCase(unittest.TestCase):
         # when we're running tests anyway
         sunday = _get_latest_sunday()
         expected_title = f"MCR Video Teardown (Sunday, {sunday.strftime('%B')} {_day_with_suffix(sunday.day)})"
+        config = _get_config()
         issue = external_services.find_latest_github_issue(
-            type=IssueType.MCR_VIDEO_TEARDOWN, config=_get_config()
+            type=IssueType.MCR_VIDEO_TEARDOWN,
+            config=config,
+            http=HttpSessionProvider(config),
         )
         self.assertEqual(expected_title, issue.title)
         self._check_web_page(url=issue.html_url, expected_title=expected_title)
@@ -13,6 +13,7 @@ from config import Config
 from external_services import (
     Attachment,
     CredentialStore,
+    HttpSessionProvider,
     Plan,
     PlanId,
     PlanningCenterClient,
@@ -58,6 +59,7 @@ class PlanningCenterTestCase(unittest.TestCase):
             messenger=self._messenger,
             credential_store=credential_store,
             config=config,
+            http=HttpSessionProvider(config),
             # Use a different value from test_find_message_notes
             lazy_login=False,
         )
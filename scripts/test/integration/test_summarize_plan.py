@@ -1,18 +1,22 @@
+import dataclasses
 import inspect
 import json
 import os
+import shutil
+import sqlite3
 import unittest
-from datetime import date
+from datetime import date, datetime
 from pathlib import Path
 from tkinter import Tk
 from typing import Any, Dict, Tuple
-from unittest.mock import create_autospec
+from unittest.mock import create_autospec, patch
 
 from args import ReccArgs
 from autochecklist import Messenger
 from config import Config
 from external_services import (
     CredentialStore,
+    HttpSessionProvider,
     ItemNote,
     Plan,
     PlanId,
@@ -27,8 +31,10 @@ from lib import (
     NoOp,
     PlanSummary,
     PlanSummaryDiff,
+    PlanSummaryStore,
     diff_plan_summaries,
     get_plan_summary,
+    get_plan_summary_if_changed,
     get_vocals_notes,
     load_plan_summary,
     plan_summary_diff_to_html,
@@ -144,6 +150,7 @@ class PlanSummaryTestCase(unittest.TestCase):
             messenger=messenger,
             credential_store=credential_store,
             config=config,
+            http=HttpSessionProvider(config),
             lazy_login=True,
         )
         pco_client._send_and_check_status = (  # pyright: ignore[reportPrivateUsage]
@@ -239,6 +246,43 @@ class GeneratePlanSummaryTestCase(PlanSummaryTestCase):
         self.assert_equal_summary(expected=expected_summary, actual=actual_summary)
         self._log_problem_mock.assert_not_called()
 
+    def test_summarize_if_changed(self) -> None:
+        expected_summary = load_plan_summary(
+            _DATA_DIR.joinpath("20240414_summary.json")
+        )
+        fingerprint, actual_summary = get_plan_summary_if_changed(
+            client=self._pco_client,
+            messenger=self._messenger,
+            config=self._config,
+            dt=date(2024, 4, 14),
+            fingerprint=None,
+        )
+        assert actual_summary is not None
+        self.assert_equal_summary(expected_summary, actual_summary)
+
+        # Same plan, so there's no need to summarize it again
+        second_fingerprint, second_summary = get_plan_summary_if_changed(
+            client=self._pco_client,
+            messenger=self._messenger,
+            config=self._config,
+            dt=date(2024, 4, 14),
+            fingerprint=fingerprint,
+        )
+        self.assertEqual(fingerprint, second_fingerprint)
+        self.assertIsNone(second_summary)
+
+        # Different plan
+        third_fingerprint, third_summary = get_plan_summary_if_changed(
+            client=self._pco_client,
+            messenger=self._messenger,
+            config=self._config,
+            dt=date(2024, 5, 5),
+            fingerprint=fingerprint,
+        )
+        self.assertNotEqual(fingerprint, third_fingerprint)
+        self.assertIsNotNone(third_summary)
+        self._log_problem_mock.assert_not_called()
+
 
 class DiffPlanSummaryTestCase(PlanSummaryTestCase):
     def test_no_diff(self) -> None:
@@ -573,7 +617,7 @@ class PlanSummaryToHtmlTestCase(unittest.TestCase):
         )
         diff = diff_plan_summaries(original_summary, edited_summary)
         summary_html = plan_summary_diff_to_html(
-            diff, old_plans=[], current_plan_id="", port=8080
+            diff, old_plans=[], current_plan_id="", latest_summary_id="", port=8080
         )
         f = _TEMP_DIR.joinpath("summary.html")
         f.write_text(summary_html, encoding="utf-8")
@@ -603,6 +647,47 @@ class PlanSummaryToHtmlTestCase(unittest.TestCase):
         )
         self.assertEqual(expected_text, _get_clipboard_text())
 
+    def test_highlight_changed_words(self) -> None:
+        """
+        Test that only the words that changed within an edited line of the
+        message notes are highlighted.
+        """
+        original_summary = load_plan_summary(
+            _DATA_DIR.joinpath("20240414_summary.json")
+        )
+        assert original_summary.message_notes is not None
+        edited_summary = dataclasses.replace(
+            original_summary,
+            message_notes=dataclasses.replace(
+                original_summary.message_notes,
+                content=original_summary.message_notes.content.replace(
+                    "Our Worth Is Revealed By Our Garments",
+                    "Our Worth Is Shown By Our Clothes",
+                ),
+            ),
+        )
+        diff = diff_plan_summaries(original_summary, edited_summary)
+        summary_html = plan_summary_diff_to_html(
+            diff, old_plans=[], current_plan_id="", latest_summary_id="", port=8080
+        )
+        self.assertIn(
+            "Our Worth Is <span class='changed-words'>Revealed</span> By Our <span class='changed-words'>Garments</span>",
+            summary_html,
+        )
+        self.assertIn(
+            "Our Worth Is <span class='changed-words'>Shown</span> By Our <span class='changed-words'>Clothes</span>",
+            summary_html,
+        )
+        # Lines with nothing in common are not highlighted word by word
+        diff = diff_plan_summaries(
+            original_summary,
+            load_plan_summary(_DATA_DIR.joinpath("20240414_summary_edited.json")),
+        )
+        summary_html = plan_summary_diff_to_html(
+            diff, old_plans=[], current_plan_id="", latest_summary_id="", port=8080
+        )
+        self.assertNotIn("<span class='changed-words'>", summary_html)
+
 
 class PlanSummaryJsonTestCase(PlanSummaryTestCase):
     SUMMARY = PlanSummary(
@@ -741,6 +826,106 @@ class PlanSummaryJsonTestCase(PlanSummaryTestCase):
         self.assertGreater(n, 0)
 
 
+class PlanSummaryStoreTestCase(PlanSummaryTestCase):
+    def setUp(self):
+        super().setUp()
+        self._db_file = _TEMP_DIR.joinpath("plan_summaries.sqlite3")
+        self._db_file.unlink(missing_ok=True)
+
+    def test_revisions(self) -> None:
+        original = load_plan_summary(_DATA_DIR.joinpath("20240414_summary.json"))
+        one_line_edit = dataclasses.replace(original, num_visuals_notes=3)
+        edited = load_plan_summary(_DATA_DIR.joinpath("20240414_summary_edited.json"))
+        store = PlanSummaryStore(self._db_file)
+        with patch("lib.plan_summary_store.datetime") as mock_datetime:
+            mock_datetime.now.side_effect = [
+                datetime(2024, 4, 14, 8, 0, 0),
+                datetime(2024, 4, 14, 8, 5, 0),
+                datetime(2024, 4, 14, 8, 10, 0),
+            ]
+            ids = [store.add(original), store.add(one_line_edit), store.add(edited)]
+
+        self.assertEqual(["20240414080000", "20240414080500", "20240414081000"], ids)
+        self.assertEqual(ids, store.list_ids(date(2024, 4, 14)))
+        self.assertEqual([], store.list_ids(date(2024, 4, 15)))
+        self.assertEqual("20240414081000", store.latest_id(date(2024, 4, 14)))
+        # Use a fresh object to make sure everything is read from disk
+        store = PlanSummaryStore(self._db_file)
+        self.assert_equal_summary(original, store.load(ids[0]))
+        self.assert_equal_summary(one_line_edit, store.load(ids[1]))
+        self.assert_equal_summary(edited, store.load(ids[2]))
+        with self.assertRaises(KeyError):
+            store.load("20240414090000")
+
+        # Only the latest revision should be stored in full
+        with sqlite3.connect(self._db_file) as conn:
+            sizes = dict(
+                conn.execute("SELECT id, length(content) FROM revisions").fetchall()
+            )
+        self.assertEqual(len(plan_summary_to_json(edited)), sizes[ids[2]])
+        self.assertLess(sizes[ids[1]], len(plan_summary_to_json(one_line_edit)))
+        # One-line edits shouldn't take up much space
+        self.assertLess(sizes[ids[0]], 100)
+
+        store.delete_day(date(2024, 4, 14))
+        self.assertIsNone(store.latest_id(date(2024, 4, 14)))
+
+    def test_edit_message_notes(self) -> None:
+        original = load_plan_summary(_DATA_DIR.joinpath("20240414_summary.json"))
+        assert original.message_notes is not None
+        lines = original.message_notes.content.split("\n")
+        self.assertGreater(len(lines), 10)
+        lines[5] = "This line was edited."
+        edited = dataclasses.replace(
+            original,
+            message_notes=dataclasses.replace(
+                original.message_notes, content="\n".join(lines)
+            ),
+        )
+        store = PlanSummaryStore(self._db_file)
+        with patch("lib.plan_summary_store.datetime") as mock_datetime:
+            mock_datetime.now.side_effect = [
+                datetime(2024, 4, 14, 8, 0, 0),
+                datetime(2024, 4, 14, 8, 5, 0),
+            ]
+            ids = [store.add(original), store.add(edited)]
+
+        self.assert_equal_summary(original, store.load(ids[0]))
+        self.assert_equal_summary(edited, store.load(ids[1]))
+        with sqlite3.connect(self._db_file) as conn:
+            (size,) = conn.execute(
+                "SELECT length(content) FROM revisions WHERE id = ?", (ids[0],)
+            ).fetchone()
+        # Only the edited line of the message notes should be stored again
+        self.assertLess(size, len(lines[5]) + 200)
+
+    def test_import_json_files(self) -> None:
+        dir = _TEMP_DIR.joinpath("legacy_plan_summaries")
+        shutil.rmtree(dir, ignore_errors=True)
+        dir.mkdir()
+        original = load_plan_summary(_DATA_DIR.joinpath("20240414_summary.json"))
+        edited = load_plan_summary(_DATA_DIR.joinpath("20240414_summary_edited.json"))
+        dir.joinpath("20240414080000.json").write_text(
+            plan_summary_to_json(original), encoding="utf-8"
+        )
+        dir.joinpath("20240414081000.json").write_text(
+            plan_summary_to_json(edited), encoding="utf-8"
+        )
+        dir.joinpath("20240414090000.json").write_text("{not json", encoding="utf-8")
+        db_file = dir.joinpath("plan_summaries.sqlite3")
+
+        store = PlanSummaryStore(db_file)
+        ids = store.list_ids(date(2024, 4, 14))
+        self.assertEqual(["20240414080000", "20240414081000"], ids)
+        self.assert_equal_summary(original, store.load(ids[0]))
+        self.assert_equal_summary(edited, store.load(ids[1]))
+
+        # The files should only be imported once
+        store.delete_day(date(2024, 4, 14))
+        store = PlanSummaryStore(db_file)
+        self.assertEqual([], store.list_ids(date(2024, 4, 14)))
+
+
 class GetVocalsNotesTestCase(PlanSummaryTestCase):
     """Test `get_vocals_notes()`."""
 
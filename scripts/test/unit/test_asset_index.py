@@ -0,0 +1,97 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import lib.asset_index
+from lib.asset_index import AssetIndex
+
+
+class AssetIndexTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        root = Path(self._temp_dir.name)
+        self._assets_dir = root.joinpath("assets")
+        self._assets_dir.mkdir()
+        self._index_file = root.joinpath("index.json")
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def test_find_duplicate(self) -> None:
+        original = self._assets_dir.joinpath("a.png")
+        original.write_bytes(b"foo")
+        self._assets_dir.joinpath("b.png").write_bytes(b"bar")
+        self._assets_dir.joinpath("c.png.123.part").write_bytes(b"foo")
+        new = self._assets_dir.joinpath("d.png")
+        new.write_bytes(b"foo")
+
+        index = AssetIndex(self._index_file)
+        self.assertEqual(original, index.find_duplicate(new))
+        self.assertIsNone(index.find_duplicate(self._assets_dir.joinpath("b.png")))
+
+    def test_only_changed_files_are_rehashed(self) -> None:
+        self._assets_dir.joinpath("a.png").write_bytes(b"foo")
+        self._assets_dir.joinpath("b.png").write_bytes(b"bar")
+        new = self._assets_dir.joinpath("c.png")
+        new.write_bytes(b"bar")
+        index = AssetIndex(self._index_file)
+        index.refresh(self._assets_dir)
+        index.save()
+
+        new.write_bytes(b"foo")
+        with patch.object(
+            lib.asset_index, "hash_file", wraps=lib.asset_index.hash_file
+        ) as hash_file:
+            # Use a fresh object to make sure the index is read from disk
+            index = AssetIndex(self._index_file)
+            dup = index.find_duplicate(new)
+        self.assertEqual(self._assets_dir.joinpath("a.png"), dup)
+        hash_file.assert_called_once_with(new.resolve())
+
+    def test_known_hash(self) -> None:
+        self._assets_dir.joinpath("a.png").write_bytes(b"foo")
+        index = AssetIndex(self._index_file)
+        index.refresh(self._assets_dir)
+        new = self._assets_dir.joinpath("b.png")
+        new.write_bytes(b"foo")
+        sha256 = lib.asset_index.hash_file(new)
+
+        with patch.object(lib.asset_index, "hash_file") as hash_file:
+            dup = index.find_duplicate(new, sha256=sha256)
+        self.assertEqual(self._assets_dir.joinpath("a.png"), dup)
+        hash_file.assert_not_called()
+
+    def test_record(self) -> None:
+        new = self._assets_dir.joinpath("a.png")
+        new.write_bytes(b"foo")
+        sha256 = lib.asset_index.hash_file(new)
+        index = AssetIndex(self._index_file)
+        index.record(new, sha256)
+        index.save()
+
+        with patch.object(lib.asset_index, "hash_file") as hash_file:
+            # Use a fresh object to make sure the index is read from disk
+            index = AssetIndex(self._index_file)
+            self.assertEqual(sha256, index.get_hash(new))
+        hash_file.assert_not_called()
+
+    def test_get_hash_only_reads_one_file(self) -> None:
+        self._assets_dir.joinpath("a.png").write_bytes(b"foo")
+        self._assets_dir.joinpath("b.png").write_bytes(b"bar")
+        p = self._assets_dir.joinpath("c.png")
+        p.write_bytes(b"baz")
+        index = AssetIndex(self._index_file)
+
+        with patch.object(
+            lib.asset_index, "hash_file", wraps=lib.asset_index.hash_file
+        ) as hash_file:
+            sha256 = index.get_hash(p)
+            self.assertEqual(sha256, index.get_hash(p))
+        self.assertEqual(lib.asset_index.hash_file(p), sha256)
+        hash_file.assert_called_once_with(p.resolve())
+
+        p.write_bytes(b"changed")
+        self.assertEqual(lib.asset_index.hash_file(p), index.get_hash(p))
+        p.unlink()
+        self.assertIsNone(index.get_hash(p))
@@ -156,6 +156,31 @@ class DiffTestCase(unittest.TestCase):
         ]
         self.assertEqual(actual, expected)
 
+    def test_long_input(self) -> None:
+        original = [f"Line {i}" for i in range(5000)]
+        edited = original[:1000] + ["New line"] + original[1000:4000] + original[4001:]
+        actual = find_diff(original, edited)
+        expected = (
+            [NoOp(x) for x in original[:1000]]
+            + [Insertion("New line")]
+            + [NoOp(x) for x in original[1000:4000]]
+            + [Deletion("Line 4000")]
+            + [NoOp(x) for x in original[4001:]]
+        )
+        self.assertEqual(actual, expected)
+
+    def test_nothing_in_common(self) -> None:
+        actual = find_diff(list("abc"), list("xyz"))
+        expected = [
+            Deletion("a"),
+            Deletion("b"),
+            Deletion("c"),
+            Insertion("x"),
+            Insertion("y"),
+            Insertion("z"),
+        ]
+        self.assertEqual(actual, expected)
+
     def test_noop_repr(self) -> None:
         x = NoOp("abc")
         self.assertEqual(eval(repr(x)), x)
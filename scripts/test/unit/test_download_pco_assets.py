@@ -1,12 +1,13 @@
 # pyright: reportPrivateUsage=false
 
 import unittest
+from pathlib import Path
 from typing import Optional
 
 from args import ReccArgs
 from config import Config
 from lib import Attachment
-from lib.assets import AssetManager, Attachment
+from lib.assets import AssetManager, Attachment, Download, _prioritize
 
 
 class DownloadPcoAssetsTestCase(unittest.TestCase):
@@ -166,6 +167,28 @@ class DownloadPcoAssetsTestCase(unittest.TestCase):
         )
         self.assertEqual(None, self._classify(attachment))
 
+    def test_prioritize(self) -> None:
+        def attachment(id: str, num_bytes: int) -> Attachment:
+            return Attachment(
+                id=id,
+                filename=f"{id}.mp4",
+                num_bytes=num_bytes,
+                pco_filetype="video",
+                mime_type="video/mp4",
+            )
+
+        def download(id: str, is_required: bool) -> Download:
+            return Download(Path(f"{id}.mp4"), is_required, deduplicate=False)
+
+        downloads = {
+            attachment("small", 10): download("small", is_required=False),
+            attachment("kids", 500): download("kids", is_required=True),
+            attachment("big", 1000): download("big", is_required=False),
+            attachment("notes", 5): download("notes", is_required=True),
+        }
+        order = [a.id for (a, _) in _prioritize(downloads)]
+        self.assertEqual(["kids", "notes", "big", "small"], order)
+
     def _classify(self, a: Attachment) -> Optional[str]:
         config = Config(ReccArgs.parse([]), allow_multiple_only_for_testing=True)
         manager = AssetManager(config=config)
@@ -1,11 +1,15 @@
+import tempfile
 import unittest
 from datetime import date
-from typing import Set
-from unittest.mock import call, create_autospec
+from pathlib import Path
+from typing import Any, Dict, List, Set
+from unittest.mock import call, create_autospec, patch
 
 from autochecklist import Messenger, ProblemLevel
 from config import McrSetupConfig
 from external_services import (
+    CredentialStore,
+    HttpSessionProvider,
     Plan,
     PlanId,
     PlanningCenterClient,
@@ -14,7 +18,7 @@ from external_services import (
     TeamMemberStatus,
     VmixClient,
 )
-from lib import mcr_setup
+from lib import AssetManager, mcr_setup
 from mcr_setup import McrSetupArgs
 
 
@@ -815,7 +819,7 @@ class McrSetupTestCase(unittest.TestCase):
             date=date,
             web_page_url="https://example.com",
         )
-        pco_client.find_presenters.return_value = PresenterSet(
+        pco_client.find_plan_snapshot.return_value.presenters = PresenterSet(
             speakers=speakers,
             hosts=hosts,
         )
@@ -828,3 +832,117 @@ class McrSetupTestCase(unittest.TestCase):
             allow_multiple_only_for_testing=True,
         )
         return cfg
+
+
+class SharedSnapshotTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        root = Path(self._temp_dir.name)
+        dt = date(year=2024, month=3, day=9)
+        self._config = McrSetupConfig(
+            args=McrSetupArgs.parse(["", "--date", dt.strftime("%Y-%m-%d")]),
+            profile="mcr",
+            allow_multiple_only_for_testing=True,
+        )
+        self._config.assets_by_service_dir = root.joinpath("assets")
+        self._config.cache_dir = root.joinpath("cache")
+        self._client = PlanningCenterClient(
+            messenger=create_autospec(Messenger),
+            credential_store=create_autospec(CredentialStore),
+            config=self._config,
+            http=HttpSessionProvider(self._config),
+            lazy_login=True,
+        )
+        self._client.find_plan_by_date = (
+            lambda dt: Plan(  # pyright: ignore[reportAttributeAccessIssue]
+                id=PlanId(service_type="987654", plan="123456"),
+                service_type_name="10:30AM Sunday Gathering",
+                series_title="Radiator Springs",
+                title="How to Tip Tractors",
+                date=dt,
+                web_page_url="https://example.com",
+            )
+        )
+        self._requested_urls: List[str] = []
+
+        def send(url: str, params: Dict[str, object]) -> Any:
+            self._requested_urls.append(url)
+            if url.endswith("/items"):
+                return {
+                    "data": [
+                        {
+                            "type": "Item",
+                            "id": "1",
+                            "attributes": {
+                                "item_type": "item",
+                                "title": "Message Title: Rejected By God",
+                                "description": "Line 1\nLine 2",
+                            },
+                            "relationships": {},
+                        }
+                    ],
+                    "included": [],
+                }
+            if url.endswith("/team_members"):
+                return {
+                    "data": [
+                        {
+                            "attributes": {
+                                "name": "Mater",
+                                "status": "C",
+                                "team_position_name": "Speaker",
+                            }
+                        },
+                        {
+                            "attributes": {
+                                "name": "Lightning McQueen",
+                                "status": "C",
+                                "team_position_name": "MC Host",
+                            }
+                        },
+                    ]
+                }
+            return {"data": [], "included": []}
+
+        self._client._send_and_check_status = (  # pyright: ignore[reportPrivateUsage]
+            send
+        )
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def test_tasks_share_snapshot(self) -> None:
+        self._run_tasks()
+        self.assertEqual(1, self._count_items_requests())
+        # Items, team members, and attachments
+        self.assertEqual(3, len(self._requested_urls))
+        self.assertEqual(
+            "Line 1\nLine 2",
+            self._config.message_notes_file.read_text(encoding="utf-8"),
+        )
+
+    def test_retry_refreshes_snapshot(self) -> None:
+        self._run_tasks()
+        # Retrying a task should pick up changes made on Planning Center
+        mcr_setup.download_message_notes(client=self._client, config=self._config)
+        self.assertEqual(2, self._count_items_requests())
+
+    def _run_tasks(self) -> None:
+        messenger = create_autospec(Messenger)
+        mcr_setup.update_titles(
+            vmix_client=create_autospec(VmixClient),
+            pco_client=self._client,
+            config=self._config,
+            messenger=messenger,
+        )
+        mcr_setup.download_message_notes(client=self._client, config=self._config)
+        manager = AssetManager(self._config)
+        with patch.object(manager, "plan_downloads"), patch.object(
+            manager, "execute_plan", return_value={}
+        ):
+            mcr_setup.download_assets(
+                client=self._client, messenger=messenger, manager=manager
+            )
+
+    def _count_items_requests(self) -> int:
+        return len([u for u in self._requested_urls if u.endswith("/items")])
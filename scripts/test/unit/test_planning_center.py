@@ -0,0 +1,611 @@
+import hashlib
+import os
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from unittest.mock import Mock, create_autospec, patch
+
+from aiohttp import web
+from args import ReccArgs
+from autochecklist import Messenger
+from config import Config
+from external_services import (
+    Attachment,
+    Credential,
+    CredentialStore,
+    HttpSessionProvider,
+    Plan,
+    PlanId,
+    PlanningCenterClient,
+)
+from external_services.http_cache import ResponseCache
+from external_services.rate_limit import RateLimiter
+
+_PLAN_ID = PlanId(service_type="882857", plan="69868600")
+_ATTACHMENTS_URL = "https://api.planningcenteronline.com/services/v2/service_types/882857/plans/69868600/attachments"
+
+
+def _make_attachment_json(i: int) -> Dict[str, Any]:
+    return {
+        "type": "Attachment",
+        "id": str(i),
+        "attributes": {
+            "filename": f"{i}.png",
+            "file_size": i,
+            "filetype": "image",
+            "content_type": "image/png",
+        },
+    }
+
+
+def _make_page(start: int, stop: int, total: int, include_next: bool) -> Any:
+    links = {"self": _ATTACHMENTS_URL}
+    if include_next:
+        links["next"] = f"{_ATTACHMENTS_URL}?offset={stop}"
+    return {
+        "links": links,
+        "data": [_make_attachment_json(i) for i in range(start, stop)],
+        "included": [],
+        "meta": {"total_count": total, "count": stop - start},
+    }
+
+
+class PaginationTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        config = Config(
+            args=ReccArgs.parse([]),
+            profile="foh_dev",
+            allow_multiple_only_for_testing=True,
+        )
+        self._client = PlanningCenterClient(
+            messenger=create_autospec(Messenger),
+            credential_store=create_autospec(CredentialStore),
+            config=config,
+            http=HttpSessionProvider(config),
+            lazy_login=True,
+        )
+        self._requests: List[Dict[str, object]] = []
+
+    def test_single_page(self) -> None:
+        def send(url: str, params: Dict[str, object]) -> Any:
+            self._requests.append(params)
+            return _make_page(0, 3, total=3, include_next=False)
+
+        self._client._send_and_check_status = (  # pyright: ignore[reportPrivateUsage]
+            send
+        )
+        attachments = self._client.find_attachments(_PLAN_ID)
+        self.assertEqual({a.id for a in attachments}, {"0", "1", "2"})
+        self.assertEqual(self._requests, [{"per_page": 100}])
+
+    def test_multiple_pages_with_total_count(self) -> None:
+        def send(url: str, params: Dict[str, object]) -> Any:
+            self.assertEqual(_ATTACHMENTS_URL, url)
+            self._requests.append(params)
+            start = params.get("offset", 0)
+            assert isinstance(start, int)
+            stop = min(start + 100, 250)
+            return _make_page(start, stop, total=250, include_next=stop < 250)
+
+        self._client._send_and_check_status = (  # pyright: ignore[reportPrivateUsage]
+            send
+        )
+        attachments = self._client.find_attachments(_PLAN_ID)
+        self.assertEqual(250, len(attachments))
+        self.assertIn(
+            Attachment(
+                id="249",
+                filename="249.png",
+                num_bytes=249,
+                pco_filetype="image",
+                mime_type="image/png",
+            ),
+            attachments,
+        )
+        self.assertCountEqual(
+            self._requests,
+            [
+                {"per_page": 100},
+                {"per_page": 100, "offset": 100},
+                {"per_page": 100, "offset": 200},
+            ],
+        )
+
+    def test_multiple_pages_without_total_count(self) -> None:
+        def send(url: str, params: Dict[str, object]) -> Any:
+            self._requests.append(params)
+            start = 0 if url == _ATTACHMENTS_URL else int(url.split("=")[-1])
+            stop = min(start + 100, 150)
+            page = _make_page(start, stop, total=150, include_next=stop < 150)
+            del page["meta"]["total_count"]
+            return page
+
+        self._client._send_and_check_status = (  # pyright: ignore[reportPrivateUsage]
+            send
+        )
+        attachments = self._client.find_attachments(_PLAN_ID)
+        self.assertEqual(150, len(attachments))
+        self.assertEqual(self._requests, [{"per_page": 100}, {}])
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        config = Config(
+            args=ReccArgs.parse([]),
+            profile="foh_dev",
+            allow_multiple_only_for_testing=True,
+        )
+        self._client = PlanningCenterClient(
+            messenger=create_autospec(Messenger),
+            credential_store=create_autospec(CredentialStore),
+            config=config,
+            http=HttpSessionProvider(config),
+            lazy_login=True,
+        )
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._client._cache = ResponseCache(  # pyright: ignore[reportPrivateUsage]
+            Path(self._temp_dir.name)
+        )
+        self._sent_headers: List[Optional[Dict[str, str]]] = []
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def test_revalidate(self) -> None:
+        body = _make_page(0, 3, total=3, include_next=False)
+        responses = [
+            Mock(status_code=200, headers={"ETag": '"v1"'}, json=lambda: body),
+            Mock(status_code=304, headers={"ETag": '"v1"'}),
+        ]
+
+        def send(
+            url: str,
+            params: Dict[str, object],
+            force_auth: bool,
+            headers: Optional[Dict[str, str]] = None,
+        ) -> Any:
+            self._sent_headers.append(headers)
+            return responses.pop(0)
+
+        self._client._send = send  # pyright: ignore[reportPrivateUsage]
+        first = self._client.find_attachments(_PLAN_ID)
+        second = self._client.find_attachments(_PLAN_ID)
+
+        self.assertEqual(3, len(first))
+        self.assertEqual(first, second)
+        self.assertEqual([None, {"If-None-Match": '"v1"'}], self._sent_headers)
+
+    def test_no_validators(self) -> None:
+        body = _make_page(0, 3, total=3, include_next=False)
+
+        def send(
+            url: str,
+            params: Dict[str, object],
+            force_auth: bool,
+            headers: Optional[Dict[str, str]] = None,
+        ) -> Any:
+            self._sent_headers.append(headers)
+            return Mock(status_code=200, headers={}, json=lambda: body)
+
+        self._client._send = send  # pyright: ignore[reportPrivateUsage]
+        self._client.find_attachments(_PLAN_ID)
+        self._client.find_attachments(_PLAN_ID)
+
+        self.assertEqual([None, None], self._sent_headers)
+
+
+class RateLimitTestCase(unittest.TestCase):
+    def test_requests_are_queued(self) -> None:
+        now = 100.0
+        limiter = RateLimiter(limit=2, period=10, clock=lambda: now)
+        with patch("external_services.rate_limit.time.sleep") as sleep:
+            for _ in range(4):
+                limiter.acquire()
+        # The first two requests use up the bucket and each later request
+        # waits for one more token
+        self.assertEqual([5.0, 10.0], [c.args[0] for c in sleep.call_args_list])
+
+    def test_pause(self) -> None:
+        now = 100.0
+        limiter = RateLimiter(limit=100, period=10, clock=lambda: now)
+        limiter.pause(30)
+        with patch("external_services.rate_limit.time.sleep") as sleep:
+            limiter.acquire()
+        sleep.assert_called_once_with(30)
+
+    def test_retry_after_429(self) -> None:
+        config = Config(
+            args=ReccArgs.parse([]),
+            profile="foh_dev",
+            allow_multiple_only_for_testing=True,
+        )
+        credential_store = create_autospec(CredentialStore)
+        credential_store.get_multiple.return_value = {
+            Credential.PLANNING_CENTER_APP_ID: "id",
+            Credential.PLANNING_CENTER_SECRET: "secret",
+        }
+        http = Mock()
+        http.get.return_value.get.side_effect = [
+            Mock(status_code=429, headers={"Retry-After": "0"}),
+            Mock(
+                status_code=200,
+                headers={
+                    "X-PCO-API-Request-Rate-Limit": "50",
+                    "X-PCO-API-Request-Rate-Period": "20",
+                },
+            ),
+        ]
+        client = PlanningCenterClient(
+            messenger=create_autospec(Messenger),
+            credential_store=credential_store,
+            config=config,
+            lazy_login=True,
+            http=http,
+        )
+        response = client._send(  # pyright: ignore[reportPrivateUsage]
+            url=_ATTACHMENTS_URL, params={}, force_auth=False
+        )
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, http.get.return_value.get.call_count)
+
+
+class FindPlanByDateTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._config = Config(
+            args=ReccArgs.parse([]),
+            profile="foh_dev",
+            allow_multiple_only_for_testing=True,
+        )
+        self._messenger = create_autospec(Messenger)
+        self._client = PlanningCenterClient(
+            messenger=self._messenger,
+            credential_store=create_autospec(CredentialStore),
+            config=self._config,
+            http=HttpSessionProvider(self._config),
+            lazy_login=True,
+        )
+        self._requested_urls: List[str] = []
+
+    def test_multiple_service_types(self) -> None:
+        base_url = self._config.pco_services_base_url
+        skipped = next(iter(self._config.pco_skipped_service_types))
+
+        def send(url: str, params: Dict[str, object]) -> Any:
+            self._requested_urls.append(url)
+            if url == f"{base_url}/service_types":
+                return {
+                    "data": [
+                        {"id": i, "attributes": {"name": f"Type {i}"}}
+                        for i in ["1", "2", "3", skipped]
+                    ]
+                }
+            service_type = url.split("/")[-2]
+            plans = [] if service_type == "3" else [service_type]
+            return {
+                "data": [
+                    {
+                        "id": f"plan{p}",
+                        "attributes": {
+                            "series_title": "Series",
+                            "title": f"Title {p}",
+                            "planning_center_url": "",
+                        },
+                    }
+                    for p in plans
+                ]
+            }
+
+        def input_from_list(choices: List[Any], **kwargs: object) -> object:
+            values = sorted((c.value for c in choices), key=lambda p: p.id.plan)
+            self.assertEqual(["plan1", "plan2"], [p.id.plan for p in values])
+            return values[1]
+
+        self._client._send_and_check_status = (  # pyright: ignore[reportPrivateUsage]
+            send
+        )
+        self._messenger.input_from_list.side_effect = input_from_list
+        dt = date(year=2024, month=12, day=25)
+        plan = self._client.find_plan_by_date(dt)
+
+        self.assertEqual(
+            Plan(
+                id=PlanId(service_type="2", plan="plan2"),
+                service_type_name="Type 2",
+                series_title="Series",
+                title="Title 2",
+                date=dt,
+                web_page_url="",
+            ),
+            plan,
+        )
+        self.assertNotIn(
+            f"{base_url}/service_types/{skipped}/plans", self._requested_urls
+        )
+        self.assertEqual(4, len(self._requested_urls))
+
+    def test_find_plans_in_range(self) -> None:
+        base_url = self._config.pco_services_base_url
+        skipped = next(iter(self._config.pco_skipped_service_types))
+        requested_params: List[Dict[str, object]] = []
+
+        def send(url: str, params: Dict[str, object]) -> Any:
+            self._requested_urls.append(url)
+            if url == f"{base_url}/service_types":
+                return {
+                    "data": [
+                        {"id": i, "attributes": {"name": f"Type {i}"}}
+                        for i in ["1", "2", skipped]
+                    ]
+                }
+            requested_params.append(params)
+            service_type = url.split("/")[-2]
+            dates = (
+                ["2024-12-29"] if service_type == "1" else ["2024-12-24", "2024-12-25"]
+            )
+            return {
+                "data": [
+                    {
+                        "id": f"plan{service_type}_{d}",
+                        "attributes": {
+                            "series_title": None,
+                            "title": None,
+                            "sort_date": f"{d}T10:30:00Z",
+                            "planning_center_url": None,
+                        },
+                    }
+                    for d in dates
+                ]
+            }
+
+        self._client._send_and_check_status = (  # pyright: ignore[reportPrivateUsage]
+            send
+        )
+        plans = self._client.find_plans_in_range(
+            date(year=2024, month=12, day=23), date(year=2024, month=12, day=29)
+        )
+
+        self.assertEqual(
+            [
+                ("plan2_2024-12-24", date(year=2024, month=12, day=24)),
+                ("plan2_2024-12-25", date(year=2024, month=12, day=25)),
+                ("plan1_2024-12-29", date(year=2024, month=12, day=29)),
+            ],
+            [(p.id.plan, p.date) for p in plans],
+        )
+        self.assertNotIn(
+            f"{base_url}/service_types/{skipped}/plans", self._requested_urls
+        )
+        # One request per service type covers the whole range
+        self.assertEqual(3, len(self._requested_urls))
+        for params in requested_params:
+            self.assertEqual(
+                {
+                    "filter": "before,after",
+                    "before": "2024-12-30",
+                    "after": "2024-12-23",
+                },
+                params,
+            )
+
+
+class PlanSnapshotTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        config = Config(
+            args=ReccArgs.parse([]),
+            profile="foh_dev",
+            allow_multiple_only_for_testing=True,
+        )
+        self._client = PlanningCenterClient(
+            messenger=create_autospec(Messenger),
+            credential_store=create_autospec(CredentialStore),
+            config=config,
+            http=HttpSessionProvider(config),
+            lazy_login=True,
+        )
+        self._requested_urls: List[str] = []
+
+        def send(url: str, params: Dict[str, object]) -> Any:
+            self._requested_urls.append(url)
+            if url.endswith("/items"):
+                return {
+                    "data": [
+                        {
+                            "type": "Item",
+                            "id": "1",
+                            "attributes": {
+                                "item_type": "item",
+                                "title": "Message Title: Rejected By God",
+                                "description": "Line 1\nLine 2",
+                            },
+                            "relationships": {},
+                        }
+                    ],
+                    "included": [],
+                }
+            if url.endswith("/team_members"):
+                return {"data": []}
+            return _make_page(0, 3, total=3, include_next=False)
+
+        self._client._send_and_check_status = (  # pyright: ignore[reportPrivateUsage]
+            send
+        )
+
+    def test_each_part_is_fetched_once(self) -> None:
+        snapshot = self._client.find_plan_snapshot(_PLAN_ID)
+        self.assertEqual("Line 1\nLine 2", snapshot.message_notes)
+        self.assertEqual(1, len(snapshot.sections))
+        self.assertEqual({"0", "1", "2"}, {a.id for a in snapshot.attachments})
+        self.assertEqual(set(), snapshot.presenters.speakers)
+
+        # Every consumer shares the same snapshot
+        snapshot = self._client.find_plan_snapshot(_PLAN_ID)
+        self.assertEqual("Line 1\nLine 2", snapshot.message_notes)
+        self.assertEqual({"0", "1", "2"}, {a.id for a in snapshot.attachments})
+        self.assertEqual(set(), snapshot.presenters.hosts)
+        self.assertEqual(3, len(self._requested_urls))
+
+    def test_refresh(self) -> None:
+        self._client.find_plan_snapshot(_PLAN_ID).sections
+        self._client.find_plan_snapshot(_PLAN_ID, refresh=True).sections
+        self.assertEqual(2, len(self._requested_urls))
+
+    def test_refresh_on_retry(self) -> None:
+        self._client.find_plan_snapshot(_PLAN_ID, reader="a").sections
+        self._client.find_plan_snapshot(_PLAN_ID, reader="b").sections
+        self.assertEqual(1, len(self._requested_urls))
+        # The same reader asking again means the task is being retried
+        self._client.find_plan_snapshot(_PLAN_ID, reader="a").sections
+        self.assertEqual(2, len(self._requested_urls))
+
+
+_FILE_CONTENTS = bytes(range(256)) * 1000
+
+
+class ResumeDownloadTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self._served_contents = _FILE_CONTENTS
+        self._range_headers: List[Optional[str]] = []
+        app = web.Application()
+        app.router.add_post("/attachments/{id}/open", self._open)
+        app.router.add_get("/file", self._get_file)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "localhost", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self._base_url = f"http://localhost:{port}"
+
+        config = Config(
+            args=ReccArgs.parse([]),
+            profile="foh_dev",
+            allow_multiple_only_for_testing=True,
+        )
+        config.pco_services_base_url = self._base_url
+        self._config = config
+        credential_store = create_autospec(CredentialStore)
+        credential_store.get_multiple.return_value = {
+            Credential.PLANNING_CENTER_APP_ID: "id",
+            Credential.PLANNING_CENTER_SECRET: "secret",
+        }
+        self._client = PlanningCenterClient(
+            messenger=create_autospec(Messenger),
+            credential_store=credential_store,
+            config=config,
+            http=HttpSessionProvider(config),
+            lazy_login=True,
+        )
+        self._temp_dir = tempfile.TemporaryDirectory()
+
+    async def asyncTearDown(self) -> None:
+        await self._runner.cleanup()
+        self._temp_dir.cleanup()
+
+    async def _open(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"data": {"attributes": {"attachment_url": f"{self._base_url}/file"}}}
+        )
+
+    async def _get_file(self, request: web.Request) -> web.StreamResponse:
+        self._range_headers.append(request.headers.get("Range"))
+        if "Range" not in request.headers:
+            return web.Response(body=self._served_contents)
+        r = request.http_range
+        start = r.start or 0
+        stop = len(self._served_contents) if r.stop is None else r.stop
+        return web.Response(
+            status=206,
+            body=self._served_contents[start:stop],
+            headers={
+                "Content-Range": f"bytes {start}-{stop - 1}/{len(self._served_contents)}"
+            },
+        )
+
+    async def test_resume_from_part_file(self) -> None:
+        attachment = Attachment(
+            id="42",
+            filename="video.mp4",
+            num_bytes=len(_FILE_CONTENTS),
+            pco_filetype="video",
+            mime_type="video/mp4",
+        )
+        destination = Path(self._temp_dir.name) / "video.mp4"
+        part = Path(self._temp_dir.name) / "video.mp4.42.part"
+        part.write_bytes(_FILE_CONTENTS[:100_000])
+        # Make sure the existing data is actually used
+        self._served_contents = b"x" * 100_000 + _FILE_CONTENTS[100_000:]
+
+        results = await self._client.download_attachments(
+            {destination: attachment}, create_autospec(Messenger), None
+        )
+
+        expected_hash = hashlib.sha256(_FILE_CONTENTS).hexdigest()
+        self.assertEqual({destination: expected_hash}, results)
+        self.assertEqual(["bytes=100000-"], self._range_headers)
+        self.assertEqual(_FILE_CONTENTS, destination.read_bytes())
+        self.assertFalse(part.exists())
+
+    async def test_part_files_are_cleaned_up(self) -> None:
+        attachment = Attachment(
+            id="42",
+            filename="video.mp4",
+            num_bytes=len(_FILE_CONTENTS),
+            pco_filetype="video",
+            mime_type="video/mp4",
+        )
+        temp_dir = Path(self._temp_dir.name)
+        destination = temp_dir / "video.mp4"
+        # Left behind by a previous version of the attachment
+        old_version = temp_dir / "video.mp4.41.part"
+        old_segments = temp_dir / "video.mp4.41.segments.part"
+        # Left behind by a download that was abandoned long ago
+        abandoned = temp_dir / "other.mp4.7.part"
+        # Could still be resumed
+        recent = temp_dir / "recent.mp4.8.part"
+        for p in [old_version, old_segments, abandoned, recent]:
+            p.write_bytes(b"foo")
+        long_ago = (
+            abandoned.stat().st_mtime
+            - PlanningCenterClient.STALE_PART_FILE_AGE.total_seconds()
+            - 60
+        )
+        os.utime(abandoned, (long_ago, long_ago))
+
+        results = await self._client.download_attachments(
+            {destination: attachment}, create_autospec(Messenger), None
+        )
+
+        expected_hash = hashlib.sha256(_FILE_CONTENTS).hexdigest()
+        self.assertEqual({destination: expected_hash}, results)
+        self.assertCountEqual([destination, recent], list(temp_dir.iterdir()))
+
+    async def test_segmented_download(self) -> None:
+        self._config.pco_segmented_download_threshold_bytes = 1000
+        self._config.pco_download_segments = 4
+        attachment = Attachment(
+            id="42",
+            filename="video.mp4",
+            num_bytes=len(_FILE_CONTENTS),
+            pco_filetype="video",
+            mime_type="video/mp4",
+        )
+        destination = Path(self._temp_dir.name) / "video.mp4"
+
+        results = await self._client.download_attachments(
+            {destination: attachment}, create_autospec(Messenger), None
+        )
+
+        expected_hash = hashlib.sha256(_FILE_CONTENTS).hexdigest()
+        self.assertEqual({destination: expected_hash}, results)
+        self.assertCountEqual(
+            [
+                "bytes=0-63999",
+                "bytes=64000-127999",
+                "bytes=128000-191999",
+                "bytes=192000-255999",
+            ],
+            self._range_headers,
+        )
+        self.assertEqual(_FILE_CONTENTS, destination.read_bytes())
+        self.assertEqual([destination], list(Path(self._temp_dir.name).iterdir()))
@@ -0,0 +1,89 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import create_autospec
+
+from args import ReccArgs
+from autochecklist import Messenger
+from config import Config
+from lib.slide_manifest import SlideManifest
+from lib.slides import SlideBlueprint, SlideGenerator
+
+
+class SlideGeneratorTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        root = Path(self._temp_dir.name)
+        self._config = Config(
+            ReccArgs.parse([]),
+            profile="foh_dev",
+            allow_multiple_only_for_testing=True,
+        )
+        self._config.cache_dir = root.joinpath("cache")
+        self._root = root
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def test_parallel_matches_serial(self) -> None:
+        blueprints = [
+            SlideBlueprint(body_text="Short", footer_text="", name="LTD1"),
+            SlideBlueprint(
+                body_text="For God so loved the world",
+                footer_text="John 3:16 (NIV)",
+                name="LTD2",
+            ),
+            SlideBlueprint(
+                body_text=" ".join(["word"] * 200), footer_text="", name="LTD3"
+            ),
+        ]
+        results = {}
+        for processes in [1, 2]:
+            directory = self._root.joinpath(f"out{processes}")
+            directory.mkdir()
+            manifest_file = directory.joinpath("manifest.json")
+            messenger = create_autospec(Messenger)
+            manifest = SlideManifest(manifest_file)
+            saved = SlideGenerator(messenger, self._config).save_lower_third_slides(
+                blueprints, directory, processes=processes, manifest=manifest
+            )
+            manifest.save()
+            results[processes] = (
+                [p.name for p in saved.paths],
+                {p.name: p.read_bytes() for p in directory.glob("*.png")},
+                json.loads(manifest_file.read_text(encoding="utf-8")),
+                messenger.log_problem.call_args_list,
+            )
+
+        (names, files, manifest_data, _) = results[1]
+        self.assertEqual(["LTD1.png", "LTD2.png", "LTD3.png"], names)
+        self.assertEqual(set(names), set(files))
+        self.assertEqual(set(names), set(manifest_data))
+        self.assertEqual(results[1], results[2])
+
+    def test_unchanged_slides_are_skipped(self) -> None:
+        blueprints = [
+            SlideBlueprint(body_text="One", footer_text="", name="FULL1"),
+            SlideBlueprint(body_text="Two", footer_text="", name="FULL2"),
+        ]
+        directory = self._root.joinpath("out")
+        directory.mkdir()
+        manifest = SlideManifest(directory.joinpath("manifest.json"))
+        generator = SlideGenerator(create_autospec(Messenger), self._config)
+
+        saved = generator.save_fullscreen_slides(
+            blueprints, directory, manifest=manifest
+        )
+        self.assertEqual([], saved.skipped)
+        blueprints[1] = SlideBlueprint(
+            body_text="Changed", footer_text="", name="FULL2"
+        )
+        saved = generator.save_fullscreen_slides(
+            blueprints, directory, manifest=manifest
+        )
+        self.assertEqual(
+            [directory.joinpath("FULL1.png"), directory.joinpath("FULL2.png")],
+            saved.paths,
+        )
+        self.assertEqual([directory.joinpath("FULL1.png")], saved.skipped)
@@ -0,0 +1,88 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from lib.slide_manifest import SlideManifest, SlideRecord
+
+
+class SlideManifestTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._slides_dir = Path(self._temp_dir.name)
+        self._manifest_file = self._slides_dir.joinpath("manifest.json")
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def test_find_current_after_reload(self) -> None:
+        path = self._slides_dir.joinpath("FULL1.png")
+        path.write_bytes(b"foo")
+        record = SlideRecord(blueprint_sha256="abc", style_sha256="def")
+        manifest = SlideManifest(self._manifest_file)
+        self.assertIsNone(manifest.find_current(path, record))
+        manifest.record(path, record)
+        manifest.save()
+
+        manifest = SlideManifest(self._manifest_file)
+        self.assertEqual(record, manifest.find_current(path, record))
+        self.assertIsNone(
+            manifest.find_current(
+                path, SlideRecord(blueprint_sha256="abc", style_sha256="xyz")
+            )
+        )
+        path.unlink()
+        self.assertIsNone(manifest.find_current(path, record))
+
+    def test_warnings_are_kept(self) -> None:
+        path = self._slides_dir.joinpath("FULL1.png")
+        path.write_bytes(b"foo")
+        record = SlideRecord(blueprint_sha256="abc", style_sha256="def")
+        manifest = SlideManifest(self._manifest_file)
+        manifest.record(
+            path,
+            SlideRecord(
+                blueprint_sha256="abc", style_sha256="def", warnings=("too long",)
+            ),
+        )
+        manifest.save()
+
+        # Use a fresh object to make sure the manifest is read from disk
+        manifest = SlideManifest(self._manifest_file)
+        previous = manifest.find_current(path, record)
+        self.assertIsNotNone(previous)
+        assert previous is not None
+        self.assertEqual(("too long",), previous.warnings)
+
+    def test_remove_stale(self) -> None:
+        kept = self._slides_dir.joinpath("FULL1.png")
+        stale = self._slides_dir.joinpath("FULL2.png")
+        other_style = self._slides_dir.joinpath("LTD1.png")
+        unrecorded = self._slides_dir.joinpath("FULL3.png")
+        record = SlideRecord(blueprint_sha256="abc", style_sha256="def")
+        manifest = SlideManifest(self._manifest_file)
+        for p in [kept, stale, other_style, unrecorded]:
+            p.write_bytes(b"foo")
+        for p in [kept, stale, other_style]:
+            manifest.record(p, record)
+
+        removed = manifest.remove_stale(keep=[kept], prefix="FULL")
+
+        self.assertEqual([stale], removed)
+        self.assertTrue(kept.exists())
+        self.assertFalse(stale.exists())
+        self.assertTrue(other_style.exists())
+        self.assertTrue(unrecorded.exists())
+        self.assertIsNotNone(manifest.find_current(other_style, record))
+
+    def test_corrupt_manifest(self) -> None:
+        path = self._slides_dir.joinpath("FULL1.png")
+        path.write_bytes(b"foo")
+        self._manifest_file.write_text("{not json", encoding="utf-8")
+        record = SlideRecord(blueprint_sha256="abc", style_sha256="def")
+        manifest = SlideManifest(self._manifest_file)
+        self.assertIsNone(manifest.find_current(path, record))
+        manifest.record(path, record)
+        manifest.save()
+        self.assertIsNotNone(
+            SlideManifest(self._manifest_file).find_current(path, record)
+        )